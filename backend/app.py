@@ -1,6 +1,6 @@
 import os
 import sys
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
@@ -9,25 +9,34 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from decimal import Decimal
 import json
+import re
 import requests
 
 # Ajouter le répertoire parent au path Python
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db import DataBase
-from objects.player import Player
+from database.game_writer import GameBatchWriter
 from objects.user import User
-from utils.ratelimit import RateLimiter
 from utils.email_service import EmailService
-from objects.team import Team
 from services.lol_ai_coach import LoLCoach
 from services.draft_simulator import DraftSimulator, DraftSide, DraftPhase
+from services.ingestion import fetch_match_details, ingest_match, ALL_QUEUES, DOWNLOAD_MAX_WORKERS
+from services import leaderboard as leaderboard_service
+from services.leaderboard import invalidate_leaderboard_cache
+from services.matchup_snapshot import get_matchup_snapshot, invalidate_matchup_cache, calculate_team_stats
+from services.game_cache import game_cache
+from services.player_refresh import resolve_player, resolve_riot_ids, save_player
+from services.backfill import run_backfill, start_backfill, finish_backfill, cancel_backfill
 
 load_dotenv()
 
 API_KEY = os.getenv("API_KEY")
 SECRET_KEY = os.getenv("SECRET_KEY")
 
+# Format des splits de /api/filter : "saison-split", ex: "15-2"
+SPLIT_PATTERN = re.compile(r"\d+-\d+")
+
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
 app.config['JWT_SECRET_KEY'] = SECRET_KEY
@@ -55,6 +64,25 @@ email_service = EmailService()
 # En production, utiliser Redis ou une base de données
 draft_sessions = {}
 
+def get_db():
+    """
+    Connexion à la base pour la requête HTTP en cours.
+    La connexion est empruntée au pool au premier appel puis rendue
+    automatiquement à la fin de la requête (voir close_db).
+    """
+    db = g.get('db')
+    if db is None or db.connection is None:
+        db = DataBase(host="localhost")
+        g.db = db
+    return db
+
+@app.teardown_appcontext
+def close_db(exception=None):
+    """Rend la connexion de la requête au pool, même si la route ne l'a pas fermée."""
+    db = g.pop('db', None)
+    if db is not None:
+        db.close()
+
 # Helper function to convert Decimal to float in nested structures
 def convert_decimals(obj):
     """Recursively convert Decimal objects to float and datetime to string"""
@@ -72,103 +100,22 @@ def convert_decimals(obj):
 
 # ==================== UTILITY FUNCTIONS ====================
 
-def find_or_create_player_with_pseudo_check(name, tag, API_KEY):
+def find_or_create_player_with_pseudo_check(name, tag, API_KEY, db=None):
     """
     Fonction utilitaire pour rechercher ou créer un joueur avec vérification des changements de pseudo.
+    Un joueur connu est servi depuis la base ; son compte et ses rangs sont rafraîchis
+    en arrière-plan lorsqu'ils sont périmés (voir services/player_refresh.py).
     
     :param name: Nom du joueur
     :param tag: Tag du joueur
     :param API_KEY: Clé API Riot
+    :param db: (Optionnel) Connexion à utiliser ; par défaut celle de la requête HTTP (get_db),
+               rendue au pool à la fin de la requête même en cas d'erreur
     :return: Tuple (player_object, player_id, db_connection)
     """
-    db = DataBase(host="localhost")
-    
-    # Étape 1: Vérifier si le joueur existe déjà en base de données
-    existing_player = None
-    try:
-        existing_player = db.get_player(name=name, tag=tag)
-    except:
-        # Le joueur n'existe pas en base, on continue
-        pass
-    
-    if existing_player:
-        # Le joueur existe en base, on récupère son PUUID et on vérifie s'il a changé de pseudo
-        puuid = existing_player['puuid']
-        
-        # Créer un objet Player temporaire pour utiliser la méthode get_account_by_puuid
-        temp_player = Player(name="", tag="", API_KEY=API_KEY)
-        current_account = temp_player.get_account_by_puuid(puuid)
-        
-        if current_account:
-            current_name = current_account['gameName']
-            current_tag = current_account['tagLine']
-            
-            # Vérifier si le pseudo a changé
-            if current_name != name or current_tag != tag:
-                print(f"Pseudo changé détecté: {name}#{tag} -> {current_name}#{current_tag}")
-                
-                # Mettre à jour le joueur avec le nouveau pseudo et les rangs actuels
-                player = Player(name=current_name, tag=current_tag, API_KEY=API_KEY)
-                if player.puuid:
-                    player_id = db.insert_player(
-                        name=player.name, 
-                        tag=player.tag, 
-                        puuid=player.puuid, 
-                        soloq=player.soloq, 
-                        flex=player.flexq
-                    )
-                else:
-                    # Si on ne peut pas récupérer les infos, utiliser l'ancien joueur
-                    player = Player(name=name, tag=tag, API_KEY=API_KEY)
-                    if not player.puuid:
-                        return None, None, db
-                    player_id = db.insert_player(
-                        name=player.name, 
-                        tag=player.tag, 
-                        puuid=player.puuid, 
-                        soloq=player.soloq, 
-                        flex=player.flexq
-                    )
-            else:
-                # Le pseudo n'a pas changé, utiliser les données existantes
-                player = Player(name=name, tag=tag, API_KEY=API_KEY)
-                if not player.puuid:
-                    return None, None, db
-                player_id = db.insert_player(
-                    name=player.name, 
-                    tag=player.tag, 
-                    puuid=player.puuid, 
-                    soloq=player.soloq, 
-                    flex=player.flexq
-                )
-        else:
-            # Impossible de récupérer les infos actuelles, utiliser l'ancien joueur
-            player = Player(name=name, tag=tag, API_KEY=API_KEY)
-            if not player.puuid:
-                return None, None, db
-            player_id = db.insert_player(
-                name=player.name, 
-                tag=player.tag, 
-                puuid=player.puuid, 
-                soloq=player.soloq, 
-                flex=player.flexq
-            )
-    else:
-        # Le joueur n'existe pas en base, créer un nouveau joueur
-        player = Player(name=name, tag=tag, API_KEY=API_KEY)
-        
-        if not player.puuid:
-            return None, None, db
-        
-        # Insérer le nouveau joueur
-        player_id = db.insert_player(
-            name=player.name, 
-            tag=player.tag, 
-            puuid=player.puuid, 
-            soloq=player.soloq, 
-            flex=player.flexq
-        )
-    
+    if db is None:
+        db = get_db()
+    player, player_id = resolve_player(db, name, tag, API_KEY)
     return player, player_id, db
 
 # ==================== API ROUTES ====================
@@ -182,7 +129,7 @@ def health_check():
 def get_all_champions():
     """Récupérer tous les champions disponibles"""
     try:
-        db = DataBase(host="localhost")
+        db = get_db()
         champions = db.get_all_champion()
         db.close()
         
@@ -208,7 +155,7 @@ def get_player_id():
         if not name or not tag:
             return jsonify({"error": "Nom et tag requis"}), 400
         
-        db = DataBase(host="localhost")
+        db = get_db()
         player = db.get_player(name=name, tag=tag)
         
         if not player:
@@ -230,7 +177,7 @@ def get_teams():
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
+        db = get_db()
         teams = db.get_user_teams(int(user_id))
         
         return jsonify({"teams": teams}), 200
@@ -254,7 +201,7 @@ def create_team():
     if not team_name:
         return jsonify({"error": "Nom de l'équipe requis"}), 400
     
-    db = DataBase(host="localhost")
+    db = get_db()
     
     # Créer l'équipe
     team_id = db.insert_team(team_name, int(user_id))
@@ -284,7 +231,7 @@ def get_team(team_id):
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
+        db = get_db()
         team = db.get_team_by_id(team_id)
         
         if not team:
@@ -315,7 +262,7 @@ def update_team(team_id):
         if not team_name:
             return jsonify({"error": "Nom de l'équipe requis"}), 400
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que l'équipe existe et appartient à l'utilisateur
         team = db.get_team_by_id(team_id)
@@ -325,20 +272,25 @@ def update_team(team_id):
         if team['user_id'] != int(user_id):
             return jsonify({"error": "Accès non autorisé"}), 403
         
-        # Mettre à jour l'équipe
-        db.update_team(team_id, team_name)
-        
-        # Supprimer les anciens joueurs
-        db.delete_team_players(team_id)
-        
-        # Ajouter les nouveaux joueurs
-        for player in players:
-            db.insert_team_player(
-                team_id=team_id,
-                player_id=player['player_id'],
-                position=player['position'],
-                is_sub=player.get('is_sub', False)
-            )
+        try:
+            # Mettre à jour l'équipe
+            db.update_team(team_id, team_name)
+            
+            # Supprimer les anciens joueurs
+            db.delete_team_players(team_id)
+            
+            # Ajouter les nouveaux joueurs
+            for player in players:
+                db.insert_team_player(
+                    team_id=team_id,
+                    player_id=player['player_id'],
+                    position=player['position'],
+                    is_sub=player.get('is_sub', False)
+                )
+        finally:
+            # Invalidation après les écritures (même partielles) : un snapshot reconstruit
+            # pendant la mise à jour ne peut pas rester en cache avec l'ancien effectif
+            invalidate_matchup_cache(team_id=team_id)
         
         # Récupérer l'équipe mise à jour
         updated_team = db.get_team_by_id(team_id)
@@ -357,7 +309,7 @@ def delete_team(team_id):
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que l'équipe existe et appartient à l'utilisateur
         team = db.get_team_by_id(team_id)
@@ -369,6 +321,7 @@ def delete_team(team_id):
         
         # Supprimer l'équipe (les joueurs seront supprimés automatiquement par CASCADE)
         db.delete_team(team_id)
+        invalidate_matchup_cache(team_id=team_id)
         
         return jsonify({"message": "Équipe supprimée avec succès"}), 200
         
@@ -384,7 +337,7 @@ def get_team_details(team_id):
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que l'équipe existe et appartient à l'utilisateur
         team = db.get_team_by_id(team_id)
@@ -402,31 +355,7 @@ def get_team_details(team_id):
         players = db.get_team_players_with_stats(team_id)
 
         # Calculer les statistiques globales de l'équipe
-        total_games = 0
-        total_wins = 0
-        
-        players_team = Team(team['team_name'], players)
-
-        for player in players:
-            if player.get('player_stats'):
-                stats = player['player_stats']
-                total_games += stats.get('total_games', 0)
-                total_wins += stats.get('total_wins', 0)
-        
-        # Calculer le winrate moyen
-        winrate = round((total_wins / total_games * 100), 2) if total_games > 0 else 0
-
-        ranked_solo_avg = players_team.get_average_solo_rank()
-        ranked_flex_avg = players_team.get_average_flex_rank()
-        
-        team_stats = {
-            "total_games": total_games,
-            "winrate": float(winrate) if isinstance(winrate, Decimal) else winrate,
-            "ranked_solo_avg": ranked_solo_avg,
-            "ranked_flex_avg": ranked_flex_avg
-        }
-        
-        team['stats'] = team_stats
+        team['stats'] = calculate_team_stats(players)
         team['players'] = players
         
         # Convert all Decimal values to float
@@ -452,7 +381,7 @@ def get_matchups():
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
+        db = get_db()
         matchups = db.get_user_matchups(int(user_id))
         
         # Filtrer les matchups invalides (avec équipes manquantes)
@@ -489,7 +418,7 @@ def create_matchup():
         if team1_id == team2_id:
             return jsonify({"error": "Les deux équipes doivent être différentes"}), 400
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que les deux équipes appartiennent à l'utilisateur
         team1 = db.get_team_by_id(team1_id)
@@ -532,7 +461,7 @@ def get_matchup(matchup_id):
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
+        db = get_db()
         matchup = db.get_matchup_by_id(matchup_id)
         
         if not matchup:
@@ -560,8 +489,9 @@ def get_matchup_details(matchup_id):
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
-        matchup = db.get_matchup_by_id(matchup_id)
+        db = get_db()
+        # Matchup, équipes, joueurs et stats construits une fois puis mis en cache
+        matchup = get_matchup_snapshot(db, matchup_id)
         
         if not matchup:
             db.close()
@@ -571,47 +501,6 @@ def get_matchup_details(matchup_id):
             db.close()
             return jsonify({"error": "Accès non autorisé"}), 403
         
-        # Récupérer les détails des deux équipes
-        team1 = db.get_team_by_id(matchup['team1_id'])
-        team2 = db.get_team_by_id(matchup['team2_id'])
-        
-        # Récupérer les joueurs avec leurs stats pour chaque équipe
-        team1_players = db.get_team_players_with_stats(matchup['team1_id'])
-        team2_players = db.get_team_players_with_stats(matchup['team2_id'])
-        
-        # Calculer les stats des équipes
-        def calculate_team_stats(players):
-            total_games = 0
-            total_wins = 0
-            
-            players_team = Team("temp", players)
-            
-            for player in players:
-                if player.get('player_stats'):
-                    stats = player['player_stats']
-                    total_games += stats.get('total_games', 0)
-                    total_wins += stats.get('total_wins', 0)
-            
-            winrate = round((total_wins / total_games * 100), 2) if total_games > 0 else 0
-            ranked_solo_avg = players_team.get_average_solo_rank()
-            ranked_flex_avg = players_team.get_average_flex_rank()
-            
-            return {
-                "total_games": total_games,
-                "winrate": float(winrate) if isinstance(winrate, Decimal) else winrate,
-                "ranked_solo_avg": ranked_solo_avg,
-                "ranked_flex_avg": ranked_flex_avg
-            }
-        
-        team1['stats'] = calculate_team_stats(team1_players)
-        team1['players'] = team1_players
-        
-        team2['stats'] = calculate_team_stats(team2_players)
-        team2['players'] = team2_players
-        
-        matchup['team1'] = team1
-        matchup['team2'] = team2
-        
         # Convert all Decimal values to float
         matchup = convert_decimals(matchup)
         
@@ -633,7 +522,7 @@ def update_matchup(matchup_id):
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que le matchup existe et appartient à l'utilisateur
         matchup = db.get_matchup_by_id(matchup_id)
@@ -650,13 +539,16 @@ def update_matchup(matchup_id):
         scheduled_date = data.get('scheduled_date')
         status = data.get('status')
         
-        # Mettre à jour le matchup
-        db.update_matchup(
-            matchup_id=matchup_id,
-            matchup_name=matchup_name,
-            scheduled_date=scheduled_date,
-            status=status
-        )
+        # Mettre à jour le matchup, puis invalider le snapshot (après l'écriture)
+        try:
+            db.update_matchup(
+                matchup_id=matchup_id,
+                matchup_name=matchup_name,
+                scheduled_date=scheduled_date,
+                status=status
+            )
+        finally:
+            invalidate_matchup_cache(matchup_id=matchup_id)
         
         # Récupérer le matchup mis à jour
         updated_matchup = db.get_matchup_by_id(matchup_id)
@@ -677,7 +569,7 @@ def delete_matchup(matchup_id):
         if not user_id:
             return jsonify({"error": "Token invalide"}), 422
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que le matchup existe et appartient à l'utilisateur
         matchup = db.get_matchup_by_id(matchup_id)
@@ -691,6 +583,7 @@ def delete_matchup(matchup_id):
         
         # Supprimer le matchup
         db.delete_matchup(matchup_id)
+        invalidate_matchup_cache(matchup_id=matchup_id)
         
         db.close()
         return jsonify({"message": "Matchup supprimé avec succès"}), 200
@@ -759,7 +652,7 @@ def register():
             return jsonify({"error": "Données invalides", "details": errors}), 400
 
         # Connexion à la base de données
-        db = DataBase(host="localhost")
+        db = get_db()
 
         # Vérifier si le nom d'utilisateur existe déjà
         if db.check_username_exists(username):
@@ -808,7 +701,7 @@ def login():
             return jsonify({"error": "Nom d'utilisateur et mot de passe requis"}), 400
 
         # Connexion à la base de données
-        db = DataBase(host="localhost")
+        db = get_db()
 
         # Récupérer l'utilisateur
         user_data = db.get_user_by_username(username)
@@ -872,7 +765,7 @@ def get_current_user():
         print("DEBUG - Invalid user_id format")
         return jsonify({"error": "Token invalide - format d'ID utilisateur incorrect"}), 422
         
-    db = DataBase(host="localhost")
+    db = get_db()
     user_data = db.get_user_by_id(user_id_int)
     print(f"DEBUG - User data from DB: {user_data}")
     
@@ -902,7 +795,7 @@ def forgot_password():
             return jsonify({"error": "Adresse email requise"}), 400
 
         # Connexion à la base de données
-        db = DataBase(host="localhost")
+        db = get_db()
 
         # Vérifier si l'email existe
         user_data = db.get_user_by_email(email)
@@ -948,7 +841,7 @@ def reset_password():
             return jsonify({"error": "Token et nouveau mot de passe requis"}), 400
 
         # Connexion à la base de données
-        db = DataBase(host="localhost")
+        db = get_db()
 
         # Vérifier le token
         token_data = db.get_password_reset_token(token)
@@ -989,14 +882,14 @@ def get_leaderboard():
         if limit > 100:
             limit = 100
         
-        db = DataBase(host="localhost")
-        leaderboard = db.get_top_players_by_score(limit=limit)
+        db = get_db()
+        leaderboard, snapshot_age = leaderboard_service.get_leaderboard(db, limit=limit)
         
         # Convert all Decimal values to float
         leaderboard = convert_decimals(leaderboard)
         
         db.close()
-        return jsonify({"leaderboard": leaderboard}), 200
+        return jsonify({"leaderboard": leaderboard, "snapshot_age": round(snapshot_age, 1)}), 200
         
     except Exception as e:
         print(f"ERROR in get_leaderboard: {str(e)}")
@@ -1035,32 +928,32 @@ def import_from_opgg():
         # Positions par défaut dans l'ordre
         positions = ['TOP', 'JUNGLE', 'MID', 'ADC', 'SUPPORT']
         
-        db = DataBase(host="localhost")
+        db = get_db()
         all_champions = db.get_all_champion()
         players_data = []
         errors = []
         
+        # Résolution des Riot ID en parallèle ; la position reste celle dans le lien OP.GG
+        riot_ids = []
         for idx, player_name in enumerate(player_names):
+            if '#' not in player_name:
+                errors.append(f"{player_name}: Format invalide (attendu: nom#tag)")
+                continue
+            riot_ids.append((idx, player_name, *player_name.split('#', 1)))
+        
+        resolved = resolve_riot_ids([(name, tag) for _, _, name, tag in riot_ids], API_KEY)
+        
+        for (idx, player_name, _, _), (player, error) in zip(riot_ids, resolved):
             try:
-                if '#' not in player_name:
-                    errors.append(f"{player_name}: Format invalide (attendu: nom#tag)")
-                    continue
-                
-                name, tag = player_name.split('#', 1)
-                player = Player(name=name, tag=tag, API_KEY=API_KEY)
+                if error:
+                    raise Exception(error)
                 
-                if not player.puuid:
+                if player is None:
                     errors.append(f"{player_name}: Joueur non trouvé sur EUW")
                     continue
                 
                 # Insérer ou mettre à jour le joueur
-                player_id = db.insert_player(
-                    name=player.name, 
-                    tag=player.tag, 
-                    puuid=player.puuid, 
-                    soloq=player.soloq, 
-                    flex=player.flexq
-                )
+                player_id = save_player(db, player)
                 
                 players_data.append({
                     'id': player_id,
@@ -1106,13 +999,12 @@ def search_player():
         
         all_champions = db.get_all_champion()
         
-        # Récupérer les jeux existants
-        filters = {"player_id": player_id}
-        games = db.get_games(**filters)
+        # Statistiques par champion lues dans le rollup PlayerChampionStats
+        champion_stats = db.get_champion_stats(player_id)
         
-        if games:
-            for game in games:
-                player.build_stats(game)
+        if champion_stats:
+            for row in champion_stats:
+                player.build_stats_from_aggregate(row)
             player.get_all_stats(["all"])
         
         # Préparer la réponse
@@ -1149,7 +1041,7 @@ def search_player():
                     "kda": champ.get_kda(),
                     "kill_participation": champ.get_kill_participation()
                 }
-                for champ in player.champions
+                for champ in player.champions.values()
             ],
             "all_champions": all_champions
         }
@@ -1175,12 +1067,21 @@ def filter_games():
         end_date = data.get('end_date')
         match_types = data.get('match_types', ['all'])
         seasons = data.get('seasons', ['all'])
+        splits = data.get('splits', [])  # Format "saison-split", ex: "15-2"
         
         if not username or '#' not in username:
             return jsonify({"error": "Please provide a username and a tag!"}), 400
         
         name, tag = username.split('#', 1)
         
+        # Les splits sont validés avant toute requête : "15-x" ou "15" ne doivent pas finir en 500
+        split_pairs = []
+        for split in splits:
+            if not isinstance(split, str) or not SPLIT_PATTERN.fullmatch(split):
+                return jsonify({"error": f"Invalid split '{split}', expected format 'season-split' (ex: '15-2')"}), 400
+            season, split_number = split.split("-", 1)
+            split_pairs.append((int(season), int(split_number)))
+        
         # Utiliser la fonction utilitaire pour gérer la recherche intelligente
         player, player_id, db = find_or_create_player_with_pseudo_check(name, tag, API_KEY)
         
@@ -1188,6 +1089,11 @@ def filter_games():
             db.close()
             return jsonify({"error": "This player does not exist in EUW server!"}), 404
         
+        calendar = db.get_season_calendar()
+        unknown_splits = [f"{season}-{split}" for season, split in split_pairs if (season, split) not in calendar]
+        if unknown_splits:
+            return jsonify({"error": f"Unknown split(s): {', '.join(unknown_splits)}"}), 400
+        
         all_champions = db.get_all_champion()
         
         if "all" in match_types:
@@ -1208,11 +1114,36 @@ def filter_games():
                 filters["season"] = season_ints
         if start_date and end_date:
             filters["date_range"] = [start_date, end_date]
-        
-        games = db.get_games(**filters)
-        if games:
-            for game in games:
-                player.build_stats(game)
+        if split_pairs:
+            filters["split"] = split_pairs
+        
+        # Agrégation par champion : sur les colonnes en cache si possible, sinon côté base
+        if game_cache.available:
+            champion_stats = game_cache.get(db, player_id).champion_stats(
+                {champ['id']: champ['name'] for champ in all_champions},
+                roles=filters.get("role_"),
+                type_games=filters.get("type_game"),
+                # Saisons et splits passent par le calendrier, comme dans les requêtes SQL sur Games
+                season_ranges=db.get_season_date_ranges(seasons=filters["season"]) if "season" in filters else None,
+                champions=filters.get("champion"),
+                date_range=filters.get("date_range"),
+                date_ranges=db.get_season_date_ranges(splits=filters["split"]) if "split" in filters else None
+            )
+        elif "date_range" in filters or "split" in filters or ("season" in filters and not db.seasons_are_calendar_years(filters["season"])):
+            # Une plage de dates, un split ou une saison décalée par le calendrier ne peuvent pas
+            # être servis par le rollup (agrégé par année civile)
+            champion_stats = db.get_champion_stats_from_games(**filters)
+        else:
+            champion_stats = db.get_champion_stats(
+                player_id,
+                roles=filters.get("role_"),
+                type_games=filters.get("type_game"),
+                seasons=filters.get("season"),
+                champions=filters.get("champion")
+            )
+        if champion_stats:
+            for row in champion_stats:
+                player.build_stats_from_aggregate(row)
             player.get_all_stats(role)
         
         # Préparer la réponse
@@ -1248,7 +1179,7 @@ def filter_games():
                     "kda": champ.get_kda(),
                     "kill_participation": champ.get_kill_participation()
                 }
-                for champ in player.champions
+                for champ in player.champions.values()
             ],
             "all_champions": all_champions
         }
@@ -1262,6 +1193,15 @@ def filter_games():
         traceback.print_exc()
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
+# Limite haute de max_in_flight acceptée par les routes de téléchargement
+MAX_IN_FLIGHT_LIMIT = DOWNLOAD_MAX_WORKERS * 4
+
+def is_valid_max_in_flight(max_in_flight):
+    """Vérifie que max_in_flight est absent ou un entier entre 1 et MAX_IN_FLIGHT_LIMIT"""
+    if max_in_flight is None:
+        return True
+    return isinstance(max_in_flight, int) and not isinstance(max_in_flight, bool) and 1 <= max_in_flight <= MAX_IN_FLIGHT_LIMIT
+
 @app.route('/api/download', methods=['POST'])
 def download_games():
     """Téléchargement de nouveaux jeux pour un joueur"""
@@ -1272,12 +1212,17 @@ def download_games():
         session_id = data.get('session_id', str(uuid.uuid4()))
         start_time = data.get('startTime')  # Optional: epoch timestamp in seconds
         end_time = data.get('endTime')      # Optional: epoch timestamp in seconds
+        max_in_flight = data.get('max_in_flight')  # Optional: nombre de requêtes de détails en parallèle
+        incremental = data.get('incremental', True)  # Optional: ne récupérer que les matchs postérieurs au dernier sync
         
         print(start_time, end_time)
 
         if not username or '#' not in username:
             return jsonify({"error": "Please provide a username and a tag!"}), 400
         
+        if not is_valid_max_in_flight(max_in_flight):
+            return jsonify({"error": f"max_in_flight must be an integer between 1 and {MAX_IN_FLIGHT_LIMIT}"}), 400
+        
         # Démarrer le téléchargement en arrière-plan
         socketio.start_background_task(
             target=process_download, 
@@ -1285,7 +1230,9 @@ def download_games():
             nb_games=nb_games, 
             session_id=session_id,
             start_time=start_time,
-            end_time=end_time
+            end_time=end_time,
+            max_in_flight=max_in_flight,
+            incremental=incremental
         )
         
         return jsonify({"status": "started", "session_id": session_id})
@@ -1293,6 +1240,59 @@ def download_games():
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
+@app.route('/api/backfill', methods=['POST'])
+def backfill_games():
+    """Rattrapage de tout l'historique d'un joueur (depuis BACKFILL_START_DATE), reprenable"""
+    try:
+        data = request.get_json()
+        username = data.get('username')
+        session_id = data.get('session_id', str(uuid.uuid4()))
+        max_in_flight = data.get('max_in_flight')  # Optional: nombre de requêtes de détails en parallèle
+        
+        if not username or '#' not in username:
+            return jsonify({"error": "Please provide a username and a tag!"}), 400
+        
+        if not is_valid_max_in_flight(max_in_flight):
+            return jsonify({"error": f"max_in_flight must be an integer between 1 and {MAX_IN_FLIGHT_LIMIT}"}), 400
+        
+        # Démarrer le backfill en arrière-plan
+        socketio.start_background_task(
+            target=process_backfill,
+            username=username,
+            session_id=session_id,
+            max_in_flight=max_in_flight
+        )
+        
+        return jsonify({"status": "started", "session_id": session_id})
+        
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+@app.route('/api/backfill/cancel', methods=['POST'])
+def cancel_backfill_games():
+    """Annulation du backfill en cours d'un joueur (les fenêtres terminées restent acquises)"""
+    try:
+        data = request.get_json()
+        username = data.get('username')
+        
+        if not username or '#' not in username:
+            return jsonify({"error": "Please provide a username and a tag!"}), 400
+        
+        name, tag = username.split('#', 1)
+        db = get_db()
+        try:
+            player = db.get_player(name=name, tag=tag)
+        except IndexError:
+            return jsonify({"error": "Joueur non trouvé"}), 404
+        
+        if not cancel_backfill(player['id']):
+            return jsonify({"status": "not_running"}), 404
+        
+        return jsonify({"status": "cancelling"})
+        
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
 # ==================== WEBSOCKET EVENTS ====================
 
 @socketio.on('join')
@@ -1309,72 +1309,195 @@ def handle_connect():
 def handle_disconnect():
     print('Client disconnected')
 
-def process_download(username, nb_games, session_id, start_time=None, end_time=None):
+def after_ingestion(db, updated_player_ids):
+    """
+    Invalide les caches des joueurs dont de nouvelles parties ont été ingérées
+    et recalcule leur place dans le classement.
+    """
+    invalidate_matchup_cache(player_ids=updated_player_ids)
+    game_cache.invalidate(updated_player_ids)
+    
+    # Recalcul du classement pour les joueurs touchés, hors du chemin de /api/leaderboard
+    try:
+        if db.refresh_leaderboard_snapshot():
+            invalidate_leaderboard_cache()
+    except Exception as e:
+        print(f"Erreur lors du recalcul du classement: {e}")
+
+def process_download(username, nb_games, session_id, start_time=None, end_time=None, max_in_flight=None, incremental=True):
     """Traitement du téléchargement des jeux en arrière-plan avec gestion des changements de pseudo"""
+    db = None
     try:
         name, tag = username.split('#', 1)
         
         # Utiliser la fonction utilitaire pour gérer la recherche intelligente
-        player, player_id, db = find_or_create_player_with_pseudo_check(name, tag, API_KEY)
+        db = DataBase(host="localhost")
+        player, player_id, db = find_or_create_player_with_pseudo_check(name, tag, API_KEY, db=db)
         
         if not player or not player_id:
             socketio.emit('download_error', {'error': 'This player does not exist in EUW server!'}, room=session_id)
             db.close()
             return
         
-        match_dict = {
-            "soloq": 420,
-            "flex": 440,
-        }
-
         print(start_time, end_time)
         
-        soloq_matchs = player.get_matchs_history(start_time=start_time, end_time=end_time, match_type=match_dict["soloq"], count=nb_games)
-        flex_matchs = player.get_matchs_history(start_time=start_time, end_time=end_time, match_type=match_dict["flex"], count=nb_games)
-        normal_matchs = player.get_matchs_history(start_time=start_time, end_time=end_time, match_type="normal", count=nb_games)
-        tournament_matchs = player.get_matchs_history(start_time=start_time, end_time=end_time, match_type="tourney", count=nb_games)
-        
-        all_matchs = [soloq_matchs, flex_matchs, normal_matchs, tournament_matchs]
-        total_games = sum(len(m) for m in all_matchs)
-        print(total_games)
+        # Une seule découverte toutes files confondues : nb_games est un budget total et
+        # chaque match est classé d'après le queueId de son payload (voir classify_match)
+        # Sans fenêtre explicite, on repart du dernier match ingéré (watermark)
+        use_watermarks = incremental and not start_time and not end_time
+        state = None
+        if use_watermarks:
+            sync_states = db.get_sync_states(player_id)
+            state = sync_states.get(ALL_QUEUES)
+            if state is None and sync_states:
+                # Watermarks par file hérités : on repart du plus ancien pour ne rien sauter
+                state = min(sync_states.values(), key=lambda sync_state: sync_state["last_match_time"])
+        
+        # listing["complete"] indique si la liste a été parcourue jusqu'au watermark ou jusqu'au bout
+        listing = {"complete": False}
+        if state:
+            known_id = state["last_match_id"]
+            # Pas de limite sur la liste : le budget nb_games porte sur les matchs nouveaux,
+            # les matchs déjà enregistrés lors d'un sync tronqué sont simplement sautés
+            pages = player.iter_matchs_history(
+                start_time=state["last_match_time"], count=None, stop=lambda match_id: match_id == known_id, outcome=listing
+            )
+        elif use_watermarks:
+            pages = player.iter_matchs_history(count=None, outcome=listing)
+        else:
+            pages = player.iter_matchs_history(start_time=start_time, end_time=end_time, count=nb_games, outcome=listing)
+        
+        # Découverte au fil de l'eau : les détails de la première page sont téléchargés
+        # pendant que les pages suivantes sont listées
+        discovery = {"found": 0, "done": False, "truncated": False}
+        
+        def new_match_ids():
+            for page in pages:
+                # Les matchs déjà enregistrés pour ce joueur (par exemple via un coéquipier suivi) ne sont pas retéléchargés
+                known_ids = db.get_existing_match_ids(player_id, page)
+                match_ids = [match_id for match_id in page if match_id not in known_ids]
+                budget = max(0, nb_games - discovery["found"])
+                if len(match_ids) > budget:
+                    # Budget atteint : les matchs restants seront téléchargés au prochain sync
+                    match_ids = match_ids[:budget]
+                    discovery["truncated"] = True
+                discovery["found"] += len(match_ids)
+                yield from match_ids
+                if discovery["truncated"]:
+                    break
+            discovery["done"] = True
         
-        rate_limiter = RateLimiter()
         games_processed = 0
+        champion_ids = {}
+        # Match le plus récent traité, et présence d'un match en échec
+        newest = None
+        failed = False
+        # Les parties sont écrites par lots (une transaction par lot) au fil du téléchargement
+        writer = GameBatchWriter(db)
+        updated_player_ids = set()
+        
+        # Les détails sont récupérés en parallèle, l'écriture en base reste sur ce thread
+        for match_id, match_data, error in fetch_match_details(player, new_match_ids(), max_workers=max_in_flight):
+            games_processed += 1
+            # Tant que la découverte n'est pas terminée, le budget nb_games sert d'estimation du total
+            total_games = discovery["found"] if discovery["done"] else max(discovery["found"], nb_games)
+            progress = round(games_processed / max(1, total_games) * 100)
+            socketio.emit('progress', {'progress': progress}, room=session_id)
+            socketio.sleep(0)
+            
+            if error is not None or match_data is None:
+                if error is not None:
+                    print(f"Erreur lors du traitement du match {match_id}: {error}")
+                failed = True
+                continue
+            
+            try:
+                match_time = match_data["info"]["gameCreation"] // 1000
+                if newest is None or match_time > newest[0]:
+                    newest = (match_time, match_id)
+                
+                updated_player_ids |= ingest_match(db, writer, player, match_data, champion_ids)
+                
+            except Exception as e:
+                print(f"Erreur lors du traitement du match {match_id}: {e}")
+                failed = True
+                # Continuer avec le match suivant même en cas d'erreur
+                continue
         
-        for index, matchs in enumerate(all_matchs):
-            for match_id in matchs:
-                try:
-                    # Attendre un slot avant la requête
-                    rate_limiter.wait_for_slot()
-                    
-                    # Récupérer les informations du match
-                    game = player.get_match_info(match_id)
-                    
-                    games_processed += 1
-                    progress = round(games_processed / total_games * 100)
-                    socketio.emit('progress', {'progress': progress}, room=session_id)
-                    socketio.sleep(0)
-                    
-                    if game is None:
-                        continue
-                    
-                    match_type = ["soloq", "flex", "normal", "tourney"][index]
-                    champion_id = db.get_champion(game["Champion"])["id"]
-                    player.add_data_to_db(db, player_id=player_id, champion_id=champion_id, game=game, type_game=match_type)
-                    
-                except Exception as e:
-                    print(f"Erreur lors du traitement du match {match_id}: {e}")
-                    # Continuer avec le match suivant même en cas d'erreur
-                    games_processed += 1
-                    progress = round(games_processed / total_games * 100)
-                    socketio.emit('progress', {'progress': progress}, room=session_id)
-                    continue
+        try:
+            writer.flush()
+        except Exception as e:
+            print(f"Erreur lors de l'écriture des matchs: {e}")
+        
+        # Le watermark n'avance que si la liste a été parcourue sans trou jusqu'à l'ancien watermark
+        # (ou jusqu'au bout de l'historique) et que tous les matchs ont été ingérés : sinon les
+        # matchs non listés ou en échec seraient sautés à chaque sync suivant.
+        # Une fenêtre explicite ne déplace jamais le watermark.
+        if (use_watermarks and listing["complete"] and not discovery["truncated"]
+                and newest is not None and not failed and not writer.failed):
+            db.update_sync_state(player_id, ALL_QUEUES, newest[0], newest[1])
         
+        after_ingestion(db, updated_player_ids)
+        
+        db.close()
         socketio.emit('download_complete', {'username': username}, room=session_id)
         socketio.sleep(0)
         
     except Exception as e:
         socketio.emit('download_error', {'error': str(e)}, room=session_id)
+    finally:
+        # Connexion rendue au pool même si le traitement a échoué
+        if db is not None:
+            db.close()
+
+def process_backfill(username, session_id, max_in_flight=None):
+    """Traitement du backfill en arrière-plan, fenêtre de temps par fenêtre de temps"""
+    db = None
+    try:
+        name, tag = username.split('#', 1)
+        
+        db = DataBase(host="localhost")
+        player, player_id, db = find_or_create_player_with_pseudo_check(name, tag, API_KEY, db=db)
+        
+        if not player or not player_id:
+            socketio.emit('backfill_error', {'error': 'This player does not exist in EUW server!'}, room=session_id)
+            db.close()
+            return
+        
+        cancel_event = start_backfill(player_id)
+        if cancel_event is None:
+            socketio.emit('backfill_error', {'error': 'A backfill is already running for this player'}, room=session_id)
+            db.close()
+            return
+        
+        def on_progress(windows_done, windows_total):
+            socketio.emit('progress', {'progress': round(windows_done / max(1, windows_total) * 100)}, room=session_id)
+            socketio.sleep(0)
+        
+        try:
+            result = run_backfill(db, player, player_id, cancel_event, max_workers=max_in_flight, on_progress=on_progress)
+        finally:
+            finish_backfill(player_id)
+        
+        after_ingestion(db, result["updated_player_ids"])
+        
+        db.close()
+        event = 'backfill_cancelled' if result["cancelled"] else 'backfill_complete'
+        socketio.emit(event, {
+            'username': username,
+            'windows': result["windows"],
+            'completed': result["completed"],
+            'failed': result["failed"],
+            'matches': result["matches"]
+        }, room=session_id)
+        socketio.sleep(0)
+        
+    except Exception as e:
+        socketio.emit('backfill_error', {'error': str(e)}, room=session_id)
+    finally:
+        # Connexion rendue au pool même si le traitement a échoué
+        if db is not None:
+            db.close()
 
 # ==================== AI ANALYSIS ROUTES ====================
 
@@ -1393,17 +1516,17 @@ def analyze_player_matchup(matchup_id):
         if not position or position not in ['TOP', 'JUNGLE', 'MID', 'ADC', 'SUPPORT']:
             return jsonify({"error": "Position invalide"}), 400
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que le matchup appartient à l'utilisateur
-        matchup = db.get_matchup_by_id(matchup_id)
+        matchup = get_matchup_snapshot(db, matchup_id)
         if not matchup or matchup['user_id'] != int(user_id):
             db.close()
             return jsonify({"error": "Matchup non trouvé ou accès non autorisé"}), 403
         
         # Récupérer les joueurs des deux équipes pour la position donnée
-        team1_players = db.get_team_players_with_stats(matchup['team1_id'])
-        team2_players = db.get_team_players_with_stats(matchup['team2_id'])
+        team1_players = matchup['team1']['players']
+        team2_players = matchup['team2']['players']
         
         player1 = next((p for p in team1_players if p['position'] == position and not p.get('is_sub')), None)
         player2 = next((p for p in team2_players if p['position'] == position and not p.get('is_sub')), None)
@@ -1469,55 +1592,24 @@ def analyze_team_draft(matchup_id):
         if target_team not in [1, 2]:
             return jsonify({"error": "target_team doit être 1 ou 2"}), 400
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que le matchup appartient à l'utilisateur
-        matchup = db.get_matchup_by_id(matchup_id)
+        matchup = get_matchup_snapshot(db, matchup_id)
         if not matchup or matchup['user_id'] != int(user_id):
             db.close()
             return jsonify({"error": "Matchup non trouvé ou accès non autorisé"}), 403
         
-        # Récupérer les détails des deux équipes
-        team1 = db.get_team_by_id(matchup['team1_id'])
-        team2 = db.get_team_by_id(matchup['team2_id'])
-        
-        team1_players = db.get_team_players_with_stats(matchup['team1_id'])
-        team2_players = db.get_team_players_with_stats(matchup['team2_id'])
-        
-        # Calculer les stats des équipes
-        def calculate_team_stats(players):
-            total_games = 0
-            total_wins = 0
-            
-            players_team = Team("temp", players)
-            
-            for player in players:
-                if player.get('player_stats'):
-                    stats = player['player_stats']
-                    total_games += stats.get('total_games', 0)
-                    total_wins += stats.get('total_wins', 0)
-            
-            winrate = round((total_wins / total_games * 100), 2) if total_games > 0 else 0
-            ranked_solo_avg = players_team.get_average_solo_rank()
-            ranked_flex_avg = players_team.get_average_flex_rank()
-            
-            return {
-                "total_games": total_games,
-                "winrate": float(winrate) if isinstance(winrate, Decimal) else winrate,
-                "ranked_solo_avg": ranked_solo_avg,
-                "ranked_flex_avg": ranked_flex_avg
-            }
-        
         team1_data = {
-            'team_name': team1['team_name'],
-            'stats': calculate_team_stats(team1_players),
-            'players': team1_players
+            'team_name': matchup['team1']['team_name'],
+            'stats': matchup['team1']['stats'],
+            'players': matchup['team1']['players']
         }
         
         team2_data = {
-            'team_name': team2['team_name'],
-            'stats': calculate_team_stats(team2_players),
-            'players': team2_players
+            'team_name': matchup['team2']['team_name'],
+            'stats': matchup['team2']['stats'],
+            'players': matchup['team2']['players']
         }
         
         db.close()
@@ -1567,55 +1659,24 @@ def start_draft_simulation(matchup_id):
         if player_team not in [1, 2]:
             return jsonify({"error": "player_team doit être 1 ou 2"}), 400
         
-        db = DataBase(host="localhost")
+        db = get_db()
         
         # Vérifier que le matchup appartient à l'utilisateur
-        matchup = db.get_matchup_by_id(matchup_id)
+        matchup = get_matchup_snapshot(db, matchup_id)
         if not matchup or matchup['user_id'] != int(user_id):
             db.close()
             return jsonify({"error": "Matchup non trouvé ou accès non autorisé"}), 403
         
-        # Récupérer les détails des deux équipes
-        team1 = db.get_team_by_id(matchup['team1_id'])
-        team2 = db.get_team_by_id(matchup['team2_id'])
-        
-        team1_players = db.get_team_players_with_stats(matchup['team1_id'])
-        team2_players = db.get_team_players_with_stats(matchup['team2_id'])
-        
-        # Calculer les stats des équipes
-        def calculate_team_stats(players):
-            total_games = 0
-            total_wins = 0
-            
-            players_team = Team("temp", players)
-            
-            for player in players:
-                if player.get('player_stats'):
-                    stats = player['player_stats']
-                    total_games += stats.get('total_games', 0)
-                    total_wins += stats.get('total_wins', 0)
-            
-            winrate = round((total_wins / total_games * 100), 2) if total_games > 0 else 0
-            ranked_solo_avg = players_team.get_average_solo_rank()
-            ranked_flex_avg = players_team.get_average_flex_rank()
-            
-            return {
-                "total_games": total_games,
-                "winrate": float(winrate) if isinstance(winrate, Decimal) else winrate,
-                "ranked_solo_avg": ranked_solo_avg,
-                "ranked_flex_avg": ranked_flex_avg
-            }
-        
         team1_data = {
-            'team_name': team1['team_name'],
-            'stats': calculate_team_stats(team1_players),
-            'players': team1_players
+            'team_name': matchup['team1']['team_name'],
+            'stats': matchup['team1']['stats'],
+            'players': matchup['team1']['players']
         }
         
         team2_data = {
-            'team_name': team2['team_name'],
-            'stats': calculate_team_stats(team2_players),
-            'players': team2_players
+            'team_name': matchup['team2']['team_name'],
+            'stats': matchup['team2']['stats'],
+            'players': matchup['team2']['players']
         }
         
         # Récupérer tous les champions AVANT de fermer la connexion
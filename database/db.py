@@ -1,8 +1,13 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
 from icecream import ic
+from utils.scoring import score_champions
 import os
-from datetime import datetime
+import time
+import threading
+from datetime import date, datetime
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,6 +16,43 @@ USER_DB = os.getenv("USER_DB")
 PASSWORD_DB = os.getenv("PASSWORD_DB")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
 PORT_DB = int(os.getenv("PORT_DB", "3306"))  # Port par défaut 3306
+# Taille du pool de connexions partagé par le processus (32 maximum pour mysql.connector)
+DB_POOL_SIZE = min(int(os.getenv("DB_POOL_SIZE", "10")), pooling.CNX_POOL_MAXSIZE)
+# Temps d'attente maximum (en secondes) d'une connexion libre quand le pool est épuisé
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Calendrier des saisons {(saison, split): (date de début, date de fin)}, chargé une fois par processus
+_season_calendar = None
+_season_calendar_lock = threading.Lock()
+
+
+def get_connection_pool(host, port=PORT_DB):
+    """
+    Récupère (ou crée) le pool de connexions du processus pour un serveur.
+
+    :param host: Hôte MariaDB/MySQL
+    :param port: Port du serveur
+    :return: Objet MySQLConnectionPool
+    """
+    key = (host, port)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = pooling.MySQLConnectionPool(
+                pool_name=f"zhonyas_{host}_{port}",
+                pool_size=DB_POOL_SIZE,
+                pool_reset_session=True,
+                host=host,
+                port=port,
+                user=USER_DB,
+                password=PASSWORD_DB,
+                database=DATABASE_NAME
+            )
+            ic(f"Pool de {DB_POOL_SIZE} connexions créé pour {host}:{port}")
+        return _pools[key]
+
 
 class DataBase:
     def __init__(self, host):
@@ -24,26 +66,34 @@ class DataBase:
         self.connect()
 
     def connect(self):
-        """Connexion à la base de données."""
+        """
+        Emprunte une connexion au pool du processus.
+        Le pool vérifie la connexion (ping) avant de la rendre et la rétablit si le
+        serveur l'a fermée ; s'il est épuisé, on attend qu'une connexion se libère.
+        """
+        deadline = time.monotonic() + DB_POOL_TIMEOUT
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
-            if self.connection.is_connected():
-                ic("Connexion réussie à la base de données.")
+            pool = get_connection_pool(self.host, self.port)
+            while True:
+                try:
+                    self.connection = pool.get_connection()
+                    break
+                except PoolError:
+                    if time.monotonic() >= deadline:
+                        raise Exception(f"Aucune connexion MySQL disponible après {DB_POOL_TIMEOUT}s (DB_POOL_SIZE={DB_POOL_SIZE})")
+                    time.sleep(0.05)
 
         except Error as e:
             ic(f"Erreur lors de la connexion à MySQL: {e}")
             raise Exception(f"Erreur lors de la connexion à MySQL: {e}")
 
     def close(self):
-        """Fermeture de la connexion."""
-        if self.connection.is_connected():
-            self.connection.close()
+        """Rend la connexion au pool (sans effet si elle a déjà été rendue)."""
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            finally:
+                self.connection = None
 
     def execute_query(self, query, params=None):
         """Exécute une requête SQL (INSERT, UPDATE, DELETE)."""
@@ -127,6 +177,40 @@ class DataBase:
         query = f"SELECT * FROM Player WHERE {where_clause}"
         return self.fetch_query(query, values)[0]
 
+    def update_player_rank(self, player_id, soloq, flex, ranks, refreshed_at=None):
+        """
+        Enregistre les rangs d'un joueur (texte affiché et champs structurés) et la date du rafraîchissement.
+
+        :param player_id: ID du joueur
+        :param soloq: Texte du rang SoloQ (ou None)
+        :param flex: Texte du rang Flex (ou None)
+        :param ranks: Dictionnaire {"soloq"/"flex": {tier, rank, lp, wins, losses}} (voir Player.ranks)
+        :param refreshed_at: (Optionnel) Date du rafraîchissement, maintenant par défaut
+        """
+        columns = {"soloq": soloq, "flex": flex, "last_rank_refresh": refreshed_at or datetime.now()}
+        for prefix in ("soloq", "flex"):
+            entry = ranks.get(prefix) or {}
+            for field in ("tier", "rank", "lp", "wins", "losses"):
+                columns[f"{prefix}_{field}"] = entry.get(field)
+        return self.update_player(player_id, **columns)
+
+    def mark_player_account_checked(self, player_id, checked_at=None):
+        """Enregistre la date de la dernière vérification du compte Riot (nom/tag) d'un joueur."""
+        return self.update_player(player_id, last_account_check=checked_at or datetime.now())
+
+    def get_players_by_puuids(self, puuids):
+        """
+        Récupère en une seule requête les joueurs suivis parmi une liste de PUUID.
+
+        :param puuids: Liste de PUUID (par exemple les 10 participants d'un match)
+        :return: Dictionnaire {puuid: player_id} limité aux joueurs présents en base
+        """
+        if not puuids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(puuids))
+        query = f"SELECT id, puuid FROM Player WHERE puuid IN ({placeholders})"
+        return {row['puuid']: row['id'] for row in self.fetch_query(query, list(puuids))}
+
     # ==================== CHAMPION ====================
 
     def insert_champion(self, name, url_image):
@@ -401,113 +485,66 @@ class DataBase:
         :param role: Rôle/position pour filtrer les champions (optionnel)
         :return: Liste de TOUS les champions avec leurs statistiques et score de dangerosité
         """
-        import math
-        
-        # Ajouter le filtre de rôle si spécifié
-        role_filter = "AND g.role_ = %s" if role else ""
-        params = (player_id, role) if role else (player_id,)
-        
-        # Si on filtre par rôle, pas besoin de grouper par role_ (optimisation)
-        # Utiliser MIN(g.role_) pour éviter les erreurs de GROUP BY
+        return self._get_champions_by_dangerousness(player_id, role=role, min_games=1)
+
+    def _get_champions_by_dangerousness(self, player_id, role=None, min_games=1):
+        """
+        Calcule le score de dangerosité des champions d'un joueur à partir de PlayerChampionStats.
+        Sans filtre de rôle, chaque couple (champion, rôle) est une entrée distincte.
+
+        :param player_id: ID du joueur
+        :param role: Rôle/position pour filtrer les champions (optionnel)
+        :param min_games: Nombre minimum de parties pour qu'un champion soit retenu
+        :return: Liste des champions triée par dangerosité décroissante
+        """
         if role:
-            query = f"""
-            SELECT 
-                c.id as champion_id,
-                c.name as champion_name,
-                COUNT(*) as games_played,
-                SUM(CASE WHEN g.win = 1 THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN g.win = 0 THEN 1 ELSE 0 END) as losses,
-                SUM(g.kills) as total_kills,
-                SUM(g.death) as total_deaths,
-                SUM(g.assists) as total_assists,
-                SUM(g.total_team_kill) as total_team_kills,
-                MIN(g.role_) as role
-            FROM Games g
-            JOIN Champion c ON g.champion_id = c.id
-            WHERE g.player_id = %s {role_filter}
-            GROUP BY c.id, c.name
-            HAVING games_played >= 1
-            """
+            results = self.get_champion_stats(player_id, roles=[role], min_games=min_games)
         else:
-            query = """
-            SELECT 
-                c.id as champion_id,
-                c.name as champion_name,
-                COUNT(*) as games_played,
-                SUM(CASE WHEN g.win = 1 THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN g.win = 0 THEN 1 ELSE 0 END) as losses,
-                SUM(g.kills) as total_kills,
-                SUM(g.death) as total_deaths,
-                SUM(g.assists) as total_assists,
-                SUM(g.total_team_kill) as total_team_kills,
-                g.role_ as role
-            FROM Games g
-            JOIN Champion c ON g.champion_id = c.id
-            WHERE g.player_id = %s
-            GROUP BY c.id, c.name, g.role_
-            HAVING games_played >= 1
-            """
-        
-        results = self.fetch_query(query, params)
+            results = self.get_champion_stats(player_id, group_by_role=True, min_games=min_games)
         
+        return self._build_champion_entries(results, role=role)
+
+    @staticmethod
+    def _score_rows(rows):
+        """
+        Note des lignes agrégées par champion (games_played, wins, total_kills, ...) en une passe.
+
+        :return: Tuple de listes (winrates, kdas, kill_participations, dangerousness)
+        """
+        return score_champions(
+            [int(row['games_played']) for row in rows],
+            [int(row['wins']) for row in rows],
+            [float(row['total_kills'] or 0) for row in rows],
+            [float(row['total_deaths'] or 0) for row in rows],
+            [float(row['total_assists'] or 0) for row in rows],
+            [float(row['total_team_kills'] or 0) for row in rows]
+        )
+
+    @staticmethod
+    def _build_champion_entries(rows, role=None):
+        """
+        Calcule les statistiques et le score de dangerosité de lignes agrégées par champion.
+
+        :param rows: Lignes renvoyées par get_champion_stats (ou une requête de même forme)
+        :param role: Rôle filtré ; sinon le rôle de chaque ligne est utilisé
+        :return: Liste des champions triée par dangerosité décroissante
+        """
+        rows = list(rows)
+        winrates, kdas, kill_participations, scores = DataBase._score_rows(rows)
+
         champions_stats = []
-        for row in results:
-            # Convertir toutes les valeurs en float/int pour éviter les erreurs avec Decimal
-            games_played = int(row['games_played'])
-            wins = int(row['wins'])
-            losses = int(row['losses'])
-            total_kills = float(row['total_kills'] or 0)
-            total_deaths = max(1.0, float(row['total_deaths'] or 1))  # Éviter division par zéro
-            total_assists = float(row['total_assists'] or 0)
-            total_team_kills = max(1.0, float(row['total_team_kills'] or 1))
-            
-            # Calcul du winrate
-            winrate = float(round(100 * wins / games_played, 2)) if games_played > 0 else 0.0
-            
-            # Calcul du KDA
-            kda = float(round((total_kills + total_assists) / total_deaths, 2))
-            
-            # Calcul de la kill participation
-            kill_participation = float(round((total_kills + total_assists) / total_team_kills * 100, 2))
-            
-            # Calcul du score de dangerosité (nouvelle formule simplifiée - même que dans champion.py)
-            if games_played == 0:
-                dangerousness = 0.0
-            else:
-                # --- 1. Performance micro (faible influence) ---
-                kda_score = min(kda / 10, 1)  # normalisé, plafonné à 1
-                kp_score = kill_participation / 100  # entre 0 et 1
-                micro_performance = (0.6 * kda_score + 0.4 * kp_score) * 100
-                
-                # --- 2. Efficacité (winrate non linéaire) ---
-                winrate_factor = 1 / (1 + math.exp(-(winrate - 50) / 5))
-                efficiency = 100 * winrate_factor
-                
-                # --- 3. Fiabilité (nombre de parties) ---
-                raw_confidence = 1 / (1 + math.exp(-(games_played - 10) / 2))
-                confidence = 0.3 + 0.7 * raw_confidence  # min 0.3, max 1
-                
-                # --- 4. Score global ---
-                score = (
-                    0.65 * efficiency +          # poids fort : winrate
-                    0.25 * micro_performance +   # poids moyen : KDA/KP combinés
-                    0.18 * games_played          # bonus d'expérience
-                )
-                
-                score *= confidence  # pénalise les faibles volumes
-                dangerousness = float(round(score, 2))
-            
+        for i, row in enumerate(rows):
             champions_stats.append({
                 'champion_id': row['champion_id'],
                 'champion_name': row['champion_name'],
-                'games_played': games_played,
-                'wins': wins,
-                'losses': losses,
-                'winrate': winrate,
-                'kda': kda,
-                'kill_participation': kill_participation,
-                'dangerousness': dangerousness,
-                'role': row['role']
+                'games_played': int(row['games_played']),
+                'wins': int(row['wins']),
+                'losses': int(row['losses']),
+                'winrate': winrates[i],
+                'kda': kdas[i],
+                'kill_participation': kill_participations[i],
+                'dangerousness': scores[i],
+                'role': role if role else row['role']
             })
         
         # Trier par score de dangerosité décroissant
@@ -516,7 +553,22 @@ class DataBase:
 
     def get_team_players_with_stats(self, team_id):
         """Récupère les joueurs d'une équipe avec leurs statistiques."""
-        query = """
+        return self.get_teams_players_with_stats([team_id])[team_id]
+
+    def get_teams_players_with_stats(self, team_ids):
+        """
+        Récupère les joueurs de plusieurs équipes avec leurs statistiques en deux requêtes :
+        une pour les effectifs, une pour les champions de tous les joueurs (chacun dans son rôle).
+
+        :param team_ids: Liste des IDs d'équipes
+        :return: Dictionnaire {team_id: [joueurs]} (même structure que get_team_players_with_stats)
+        """
+        team_ids = list(dict.fromkeys(team_ids))
+        players_by_team = {team_id: [] for team_id in team_ids}
+        if not team_ids:
+            return players_by_team
+
+        query = f"""
         SELECT tp.id,
                tp.team_id,
                tp.player_id,
@@ -534,9 +586,10 @@ class DataBase:
         FROM TeamPlayer tp
         JOIN Player p ON tp.player_id = p.id
         LEFT JOIN Games g ON p.id = g.player_id
-        WHERE tp.team_id = %s
+        WHERE tp.team_id IN ({", ".join(["%s"] * len(team_ids))})
         GROUP BY tp.id, tp.team_id, tp.player_id, tp.position, tp.is_sub, p.name, p.tag, p.soloq, p.flex
         ORDER BY 
+          tp.team_id,
           CASE tp.position
             WHEN 'TOP' THEN 1
             WHEN 'JUNGLE' THEN 2
@@ -546,11 +599,8 @@ class DataBase:
             ELSE 6
           END
         """
-        results = self.fetch_query(query, (team_id,))
+        results = self.fetch_query(query, team_ids)
 
-        # Organiser les résultats avec les statistiques
-        players = []
-        
         # Mapping des positions d'équipe vers les rôles dans la base de données Games
         # Positions équipe : TOP, JUNGLE, MID, ADC, SUPPORT
         # Rôles Games : TOP, JUNGLE, MIDDLE, BOTTOM, UTILITY
@@ -561,16 +611,17 @@ class DataBase:
             'ADC': 'BOTTOM',
             'SUPPORT': 'UTILITY'
         }
-        
+
+        # TOUS les champions de chaque joueur dans sa position, en une seule requête
+        player_roles = list(dict.fromkeys(
+            (row['player_id'], position_to_role.get(row['position'], row['position'])) for row in results
+        ))
+        champions_by_player_role = self.get_champions_by_dangerousness_for_roles(player_roles)
+
         for row in results:
             player_id = row['player_id']
-            position = row['position']
-            
-            # Convertir la position en rôle pour la requête
-            role = position_to_role.get(position, position)
-            
-            # Récupérer TOUS les champions pour ce joueur dans sa position
-            all_champions = self.get_all_champions_by_dangerousness(player_id, role=role)
+            role = position_to_role.get(row['position'], row['position'])
+            all_champions = champions_by_player_role.get((player_id, role), [])
             
             # Récupérer le top 3 des champions pour l'affichage (comme avant)
             top_champions = all_champions[:3] if all_champions else []
@@ -596,30 +647,128 @@ class DataBase:
                 'all_champions': all_champions   # Tous les champions pour l'IA
             }
             
-            players.append(player)
+            players_by_team[row['team_id']].append(player)
         
-        return players
+        return players_by_team
+
+    def get_champions_by_dangerousness_for_roles(self, player_roles, min_games=1):
+        """
+        Version groupée de get_all_champions_by_dangerousness pour plusieurs couples (joueur, rôle).
+
+        :param player_roles: Liste de tuples (player_id, role)
+        :param min_games: Nombre minimum de parties pour qu'un champion soit retenu
+        :return: Dictionnaire {(player_id, role): [champions triés par dangerosité]}
+        """
+        if not player_roles:
+            return {}
+
+        player_ids = sorted({player_id for player_id, _ in player_roles})
+        query = f"""
+        SELECT 
+            s.player_id,
+            s.role_ as role,
+            c.id as champion_id,
+            c.name as champion_name,
+            SUM(s.games) as games_played,
+            SUM(s.wins) as wins,
+            SUM(s.losses) as losses,
+            SUM(s.kills) as total_kills,
+            SUM(s.deaths) as total_deaths,
+            SUM(s.assists) as total_assists,
+            SUM(s.team_kills) as total_team_kills
+        FROM PlayerChampionStats s
+        JOIN Champion c ON s.champion_id = c.id
+        WHERE s.player_id IN ({", ".join(["%s"] * len(player_ids))})
+          AND (s.player_id, s.role_) IN ({", ".join(["(%s, %s)"] * len(player_roles))})
+        GROUP BY s.player_id, s.role_, c.id, c.name
+        HAVING games_played >= %s
+        """
+        params = list(player_ids)
+        for player_id, role in player_roles:
+            params.extend((player_id, role))
+        params.append(min_games)
+
+        rows_by_player_role = {tuple(player_role): [] for player_role in player_roles}
+        for row in self.fetch_query(query, params):
+            rows_by_player_role.setdefault((row['player_id'], row['role']), []).append(row)
+
+        return {
+            (player_id, role): self._build_champion_entries(rows, role=role)
+            for (player_id, role), rows in rows_by_player_role.items()
+        }
 
     # ==================== GAME ====================
 
     def _check_if_game_exists(self, player_id, id_match):
         """Vérifie si un match existe déjà dans la base de données."""
-        query = "SELECT * FROM Games WHERE player_id = %s AND id_match = %s"
+        query = "SELECT 1 FROM Games WHERE player_id = %s AND id_match = %s LIMIT 1"
         return self.fetch_query(query, (player_id, id_match))
 
+    def get_existing_match_ids(self, player_id, match_ids):
+        """
+        Détermine en une seule requête les matchs déjà enregistrés pour un joueur.
+
+        :param player_id: ID du joueur
+        :param match_ids: Liste des IDs de matchs candidats
+        :return: Ensemble des IDs déjà présents dans Games
+        """
+        existing = set()
+        match_ids = list(match_ids)
+        # Découpage pour garder des requêtes de taille raisonnable sur les gros historiques
+        for i in range(0, len(match_ids), 1000):
+            chunk = match_ids[i:i + 1000]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            query = f"SELECT DISTINCT id_match FROM Games WHERE player_id = %s AND id_match IN ({placeholders})"
+            existing.update(row['id_match'] for row in self.fetch_query(query, [player_id] + chunk))
+        return existing
+
 
     def insert_game(self, date, type_game, win, role, kill, death, assists, total_team_kill, player_id, champion_id, id_match):
-        """Insère un match dans la base de données."""
+        """Insère un match dans la base de données (ignoré s'il existe déjà pour ce joueur)."""
+        return self.insert_games([{
+            "date": date, "type_game": type_game, "win": win, "role": role, "kill": kill, "death": death,
+            "assists": assists, "total_team_kill": total_team_kill, "player_id": player_id,
+            "champion_id": champion_id, "id_match": id_match,
+        }]) > 0
+
+    def insert_games(self, games):
+        """
+        Insère plusieurs matchs en une seule requête et une seule transaction.
+        Les doublons (player_id, id_match) sont ignorés grâce à la clé unique de Games,
+        et PlayerChampionStats est mis à jour dans la même transaction.
 
-        # Vérifie si le match existe déjà
-        if self._check_if_game_exists(player_id, id_match):
-            return False
+        :param games: Liste de dictionnaires ayant les mêmes clés que les paramètres de insert_game
+        :return: Nombre de lignes réellement insérées
+        """
+        if not games:
+            return 0
 
-        query = """
-        INSERT INTO Games (champion_id, player_id, kills, death, assists, total_team_kill, win, role_, date, type_game, id_match) 
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(games))
+        query = f"""
+        INSERT IGNORE INTO Games (champion_id, player_id, kills, death, assists, total_team_kill, win, role_, date, type_game, id_match) 
+        VALUES {placeholders}
         """
-        return self.execute_query(query, (champion_id, player_id, kill, death, assists, total_team_kill, win, role, date, type_game, id_match))
+        params = []
+        for game in games:
+            params.extend((
+                game["champion_id"], game["player_id"], game["kill"], game["death"], game["assists"],
+                game["total_team_kill"], game["win"], game["role"], game["date"], game["type_game"], game["id_match"]
+            ))
+
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(query, params)
+            inserted = cursor.rowcount
+            if inserted:
+                self._refresh_player_champion_stats(cursor, {(game["player_id"], game["champion_id"]) for game in games})
+                self._mark_leaderboard_dirty(cursor, {game["player_id"] for game in games})
+            self.connection.commit()
+            cursor.close()
+            return inserted
+        except Error as e:
+            ic(f"Erreur SQL lors de l'insertion groupée de {len(games)} matchs: {e}")
+            self.connection.rollback()
+            raise Exception(f"Erreur SQL: {e}")
 
     def update_game(self, game_id, **kwargs):
         """Met à jour un match avec des valeurs spécifiques."""
@@ -628,9 +777,67 @@ class DataBase:
         query = f"UPDATE Games SET {set_clause} WHERE id = %s"
         return self.execute_query(query, values)
 
-    def get_games(self, **kwargs):
-        """Récupère les matchs avec filtres dynamiques, incluant le nom du champion et le type de match."""
+    def get_season_calendar(self):
+        """
+        Calendrier des saisons et de leurs splits (table SeasonCalendar), mis en cache.
+
+        :return: Dictionnaire {(saison, split): (date de début, date de fin)}
+        """
+        global _season_calendar
+        with _season_calendar_lock:
+            if _season_calendar is None:
+                rows = self.fetch_query("SELECT season, split, start_date, end_date FROM SeasonCalendar") or []
+                _season_calendar = {
+                    (int(row['season']), int(row['split'])): (row['start_date'], row['end_date'])
+                    for row in rows
+                }
+            return _season_calendar
 
+    def get_season_date_ranges(self, seasons=None, splits=None):
+        """
+        Traduit des saisons et des splits en plages de dates.
+        Une saison absente du calendrier couvre l'année civile 2010 + saison.
+
+        :param seasons: (Optionnel) Liste des saisons (année - 2010)
+        :param splits: (Optionnel) Liste de tuples (saison, split)
+        :return: Liste de tuples (date de début, date de fin) incluses
+        """
+        calendar = self.get_season_calendar()
+        ranges = []
+        for season in seasons or []:
+            season = int(season)
+            bounds = [dates for (cal_season, _), dates in calendar.items() if cal_season == season]
+            if bounds:
+                ranges.append((min(start for start, _ in bounds), max(end for _, end in bounds)))
+            else:
+                ranges.append((date(2010 + season, 1, 1), date(2010 + season, 12, 31)))
+        for season, split in splits or []:
+            dates = calendar.get((int(season), int(split)))
+            if dates is None:
+                raise Exception(f"Split {split} de la saison {season} absent du calendrier")
+            ranges.append(dates)
+        return ranges
+
+    def seasons_are_calendar_years(self, seasons):
+        """
+        Indique si chaque saison couvre exactement l'année civile 2010 + saison dans le calendrier.
+        Le rollup PlayerChampionStats, agrégé par année, ne peut servir un filtre de saison que dans ce cas.
+
+        :param seasons: Liste des saisons (année - 2010)
+        :return: True si toutes les saisons correspondent à leur année civile
+        """
+        return all(
+            (start_date, end_date) == (date(2010 + int(season), 1, 1), date(2010 + int(season), 12, 31))
+            for season, (start_date, end_date) in zip(seasons, self.get_season_date_ranges(seasons=seasons))
+        )
+
+    def _build_games_filters(self, **kwargs):
+        """
+        Construit la clause WHERE des requêtes sur Games (alias g, Champion en alias c).
+        Les saisons et splits sont traduits en plages de dates pour profiter de l'index (player_id, date).
+
+        :return: Tuple (clause WHERE, liste des valeurs)
+        """
         where_clauses = []
         values = []
         for key, value in kwargs.items():
@@ -649,17 +856,14 @@ class DataBase:
                 placeholders = ", ".join(["%s"] * len(value))
                 where_clauses.append(f"c.name IN ({placeholders})")
                 values.extend(value)  
-            elif key == "season":  # Gestion des saisons (calculées à partir de la date)
-                if isinstance(value, list):
-                    # Créer des conditions pour chaque saison
-                    season_conditions = []
-                    for season in value:
-                        season_conditions.append(f"YEAR(g.date) = %s")
-                        values.append(int(season) + 2010)  # Convertir saison en année
-                    where_clauses.append(f"({' OR '.join(season_conditions)})")
+            elif key in ("season", "split"):  # Saisons (année - 2010) ou splits (saison, split)
+                if key == "season":
+                    ranges = self.get_season_date_ranges(seasons=value if isinstance(value, list) else [value])
                 else:
-                    where_clauses.append("YEAR(g.date) = %s")
-                    values.append(int(value) + 2010)  # Convertir saison en année
+                    ranges = self.get_season_date_ranges(splits=value)
+                where_clauses.append(f"({' OR '.join(['g.date BETWEEN %s AND %s'] * len(ranges)) or '1=0'})")
+                for start_date, end_date in ranges:
+                    values.extend((start_date, end_date))
             elif key == "role_":
                 placeholders = ", ".join(["%s"] * len(value))
                 where_clauses.append(f"g.{key} IN ({placeholders})")
@@ -669,6 +873,11 @@ class DataBase:
                 values.append(value)
 
         where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
+        return where_clause, values
+
+    def get_games(self, **kwargs):
+        """Récupère les matchs avec filtres dynamiques, incluant le nom du champion et le type de match."""
+        where_clause, values = self._build_games_filters(**kwargs)
         query = f"""
         SELECT g.*, c.name AS champion_name
         FROM Games g
@@ -678,6 +887,33 @@ class DataBase:
 
         return self.fetch_query(query, values)
 
+    def get_champion_stats_from_games(self, **kwargs):
+        """
+        Statistiques agrégées par champion calculées directement sur Games, avec les mêmes
+        filtres que get_games. Sert quand le rollup ne suffit pas (plage de dates arbitraire).
+
+        :return: Liste de dictionnaires de même forme que get_champion_stats
+        """
+        where_clause, values = self._build_games_filters(**kwargs)
+        query = f"""
+        SELECT 
+            c.id as champion_id,
+            c.name as champion_name,
+            COUNT(*) as games_played,
+            SUM(CASE WHEN g.win = 1 THEN 1 ELSE 0 END) as wins,
+            SUM(CASE WHEN g.win = 0 THEN 1 ELSE 0 END) as losses,
+            SUM(g.kills) as total_kills,
+            SUM(g.death) as total_deaths,
+            SUM(g.assists) as total_assists,
+            SUM(g.total_team_kill) as total_team_kills
+        FROM Games g
+        JOIN Champion c ON g.champion_id = c.id
+        WHERE {where_clause}
+        GROUP BY c.id, c.name
+        """
+
+        return self.fetch_query(query, values)
+
     def get_top_champions_by_dangerousness(self, player_id, limit=3, role=None):
         """
         Récupère le top N champions d'un joueur basé sur le score de dangerosité.
@@ -687,118 +923,140 @@ class DataBase:
         :param role: Rôle/position pour filtrer les champions (optionnel)
         :return: Liste des champions avec leurs statistiques et score de dangerosité
         """
-        import math
-        
-        # Ajouter le filtre de rôle si spécifié
-        role_filter = "AND g.role_ = %s" if role else ""
-        params = (player_id, role) if role else (player_id,)
-        
-        # Si on filtre par rôle, pas besoin de grouper par role_ (optimisation)
-        # Utiliser MIN(g.role_) pour éviter les erreurs de GROUP BY
-        if role:
-            query = f"""
-            SELECT 
-                c.id as champion_id,
-                c.name as champion_name,
-                COUNT(*) as games_played,
-                SUM(CASE WHEN g.win = 1 THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN g.win = 0 THEN 1 ELSE 0 END) as losses,
-                SUM(g.kills) as total_kills,
-                SUM(g.death) as total_deaths,
-                SUM(g.assists) as total_assists,
-                SUM(g.total_team_kill) as total_team_kills,
-                MIN(g.role_) as role
-            FROM Games g
-            JOIN Champion c ON g.champion_id = c.id
-            WHERE g.player_id = %s {role_filter}
-            GROUP BY c.id, c.name
-            HAVING games_played >= 5
-            """
-        else:
-            query = """
-            SELECT 
-                c.id as champion_id,
-                c.name as champion_name,
-                COUNT(*) as games_played,
-                SUM(CASE WHEN g.win = 1 THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN g.win = 0 THEN 1 ELSE 0 END) as losses,
-                SUM(g.kills) as total_kills,
-                SUM(g.death) as total_deaths,
-                SUM(g.assists) as total_assists,
-                SUM(g.total_team_kill) as total_team_kills,
-                g.role_ as role
-            FROM Games g
-            JOIN Champion c ON g.champion_id = c.id
-            WHERE g.player_id = %s
-            GROUP BY c.id, c.name, g.role_
-            HAVING games_played >= 5
-            """
-        
-        results = self.fetch_query(query, params)
-        
-        champions_stats = []
-        for row in results:
-            # Convertir toutes les valeurs en float/int pour éviter les erreurs avec Decimal
-            games_played = int(row['games_played'])
-            wins = int(row['wins'])
-            losses = int(row['losses'])
-            total_kills = float(row['total_kills'] or 0)
-            total_deaths = max(1.0, float(row['total_deaths'] or 1))  # Éviter division par zéro
-            total_assists = float(row['total_assists'] or 0)
-            total_team_kills = max(1.0, float(row['total_team_kills'] or 1))
-            
-            # Calcul du winrate
-            winrate = float(round(100 * wins / games_played, 2)) if games_played > 0 else 0.0
-            
-            # Calcul du KDA
-            kda = float(round((total_kills + total_assists) / total_deaths, 2))
-            
-            # Calcul de la kill participation
-            kill_participation = float(round((total_kills + total_assists) / total_team_kills * 100, 2))
-            
-            # Calcul du score de dangerosité (nouvelle formule simplifiée - même que dans champion.py)
-            if games_played == 0:
-                dangerousness = 0.0
-            else:
-                # --- 1. Performance micro (faible influence) ---
-                kda_score = min(kda / 10, 1)  # normalisé, plafonné à 1
-                kp_score = kill_participation / 100  # entre 0 et 1
-                micro_performance = (0.6 * kda_score + 0.4 * kp_score) * 100
-                
-                # --- 2. Efficacité (winrate non linéaire) ---
-                winrate_factor = 1 / (1 + math.exp(-(winrate - 50) / 5))
-                efficiency = 100 * winrate_factor
-                
-                # --- 3. Fiabilité (nombre de parties) ---
-                raw_confidence = 1 / (1 + math.exp(-(games_played - 10) / 2))
-                confidence = 0.3 + 0.7 * raw_confidence  # min 0.3, max 1
-                
-                # --- 4. Score global ---
-                score = (
-                    0.65 * efficiency +          # poids fort : winrate
-                    0.25 * micro_performance +   # poids moyen : KDA/KP combinés
-                    0.18 * games_played          # bonus d'expérience
-                )
-                
-                score *= confidence  # pénalise les faibles volumes
-                dangerousness = float(round(score, 2))
-            
-            champions_stats.append({
-                'champion_id': row['champion_id'],
-                'champion_name': row['champion_name'],
-                'games_played': games_played,
-                'wins': wins,
-                'losses': losses,
-                'winrate': winrate,
-                'kda': kda,
-                'kill_participation': kill_participation,
-                'dangerousness': dangerousness,
-                'role': row['role']
-            })
-        
-        # Trier par score de dangerosité décroissant et prendre le top N
-        champions_stats.sort(key=lambda x: x['dangerousness'], reverse=True)
-        return champions_stats[:limit]
+        return self._get_champions_by_dangerousness(player_id, role=role, min_games=5)[:limit]
+
+    # ==================== PLAYER CHAMPION STATS ====================
+
+    def _refresh_player_champion_stats(self, cursor, pairs):
+        """
+        Recalcule les lignes de PlayerChampionStats des couples (joueur, champion) donnés.
+        Appelé dans la transaction d'écriture des matchs : l'agrégat reste cohérent avec Games.
+
+        :param cursor: Curseur de la transaction en cours
+        :param pairs: Ensemble de tuples (player_id, champion_id)
+        """
+        if not pairs:
+            return
+        pairs = list(pairs)
+        player_ids = sorted({player_id for player_id, _ in pairs})
+        query = f"""
+        INSERT INTO PlayerChampionStats
+            (player_id, champion_id, role_, type_game, season, games, wins, losses, kills, deaths, assists, team_kills)
+        SELECT player_id, champion_id, COALESCE(role_, ''), COALESCE(type_game, ''), COALESCE(YEAR(date) - 2010, 0),
+               COUNT(*), SUM(win = 1), SUM(win = 0), SUM(kills), SUM(death), SUM(assists), SUM(total_team_kill)
+        FROM Games
+        WHERE player_id IN ({", ".join(["%s"] * len(player_ids))})
+          AND (player_id, champion_id) IN ({", ".join(["(%s, %s)"] * len(pairs))})
+        GROUP BY player_id, champion_id, COALESCE(role_, ''), COALESCE(type_game, ''), COALESCE(YEAR(date) - 2010, 0)
+        ON DUPLICATE KEY UPDATE
+            games = VALUES(games), wins = VALUES(wins), losses = VALUES(losses), kills = VALUES(kills),
+            deaths = VALUES(deaths), assists = VALUES(assists), team_kills = VALUES(team_kills)
+        """
+        params = list(player_ids)
+        for player_id, champion_id in pairs:
+            params.extend((player_id, champion_id))
+        cursor.execute(query, params)
+
+    def get_champion_stats(self, player_id, roles=None, type_games=None, seasons=None, champions=None, group_by_role=False, min_games=1):
+        """
+        Statistiques agrégées par champion d'un joueur, lues dans PlayerChampionStats.
+
+        :param player_id: ID du joueur
+        :param roles: (Optionnel) Liste des rôles à garder (TOP, JUNGLE, MIDDLE, BOTTOM, UTILITY)
+        :param type_games: (Optionnel) Liste des types de partie (soloq, flex, normal, tourney)
+        :param seasons: (Optionnel) Liste des saisons (année - 2010)
+        :param champions: (Optionnel) Liste des noms de champions
+        :param group_by_role: Une ligne par couple (champion, rôle) plutôt que par champion
+        :param min_games: Nombre minimum de parties par ligne
+        :return: Liste de dictionnaires (champion_id, champion_name, games_played, wins, losses, total_kills, ...)
+        """
+        where_clauses = ["s.player_id = %s"]
+        values = [player_id]
+        for column, value in (("s.role_", roles), ("s.type_game", type_games), ("s.season", seasons), ("c.name", champions)):
+            if value:
+                where_clauses.append(f"{column} IN ({', '.join(['%s'] * len(value))})")
+                values.extend(value)
+
+        role_select = ",\n            s.role_ as role" if group_by_role else ""
+        role_group = ", s.role_" if group_by_role else ""
+        query = f"""
+        SELECT 
+            c.id as champion_id,
+            c.name as champion_name,
+            SUM(s.games) as games_played,
+            SUM(s.wins) as wins,
+            SUM(s.losses) as losses,
+            SUM(s.kills) as total_kills,
+            SUM(s.deaths) as total_deaths,
+            SUM(s.assists) as total_assists,
+            SUM(s.team_kills) as total_team_kills{role_select}
+        FROM PlayerChampionStats s
+        JOIN Champion c ON s.champion_id = c.id
+        WHERE {" AND ".join(where_clauses)}
+        GROUP BY c.id, c.name{role_group}
+        HAVING games_played >= %s
+        """
+        values.append(min_games)
+        return self.fetch_query(query, values)
+
+    # ==================== SYNC STATE ====================
+
+    def get_sync_states(self, player_id):
+        """
+        Récupère les watermarks de synchronisation d'un joueur.
+
+        :param player_id: ID du joueur
+        :return: Dictionnaire {queue_type: {'last_match_time': ..., 'last_match_id': ...}}
+        """
+        query = "SELECT queue_type, last_match_time, last_match_id FROM PlayerSyncState WHERE player_id = %s"
+        return {row['queue_type']: row for row in self.fetch_query(query, (player_id,))}
+
+    def update_sync_state(self, player_id, queue_type, last_match_time, last_match_id):
+        """
+        Avance le watermark d'un joueur pour une file (il ne recule jamais).
+
+        :param player_id: ID du joueur
+        :param queue_type: Type de file (soloq, flex, normal, tourney), ou "all" pour la découverte toutes files confondues
+        :param last_match_time: Timestamp de création du dernier match ingéré (en secondes)
+        :param last_match_id: ID du dernier match ingéré
+        """
+        # last_match_id est évalué avant last_match_time, qui n'a donc pas encore été modifié
+        query = """
+        INSERT INTO PlayerSyncState (player_id, queue_type, last_match_time, last_match_id)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            last_match_id = IF(VALUES(last_match_time) >= last_match_time, VALUES(last_match_id), last_match_id),
+            last_match_time = GREATEST(last_match_time, VALUES(last_match_time))
+        """
+        return self.execute_query(query, (player_id, queue_type, last_match_time, last_match_id))
+
+    # ==================== BACKFILL ====================
+
+    def get_backfill_checkpoints(self, player_id):
+        """
+        Fenêtres de backfill déjà entièrement ingérées pour un joueur.
+
+        :param player_id: ID du joueur
+        :return: Ensemble de tuples (window_start, window_end) en timestamps (secondes)
+        """
+        query = "SELECT window_start, window_end FROM BackfillCheckpoint WHERE player_id = %s"
+        return {(row['window_start'], row['window_end']) for row in self.fetch_query(query, (player_id,))}
+
+    def add_backfill_checkpoint(self, player_id, window_start, window_end, match_count):
+        """
+        Marque une fenêtre de backfill comme terminée : elle ne sera pas reparcourue à la reprise.
+
+        :param player_id: ID du joueur
+        :param window_start: Début de la fenêtre (timestamp en secondes)
+        :param window_end: Fin de la fenêtre (timestamp en secondes)
+        :param match_count: Nombre de matchs découverts dans la fenêtre
+        """
+        query = """
+        INSERT INTO BackfillCheckpoint (player_id, window_start, window_end, match_count)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE window_end = VALUES(window_end), match_count = VALUES(match_count), completed_at = CURRENT_TIMESTAMP
+        """
+        return self.execute_query(query, (player_id, window_start, window_end, match_count))
 
     # ==================== MATCHUP ====================
 
@@ -895,86 +1153,113 @@ class DataBase:
 
     # ==================== LEADERBOARD ====================
 
+    def _mark_leaderboard_dirty(self, cursor, player_ids):
+        """
+        Marque des joueurs dont le classement doit être recalculé.
+        Appelé dans la transaction d'écriture des matchs.
+
+        :param cursor: Curseur de la transaction en cours
+        :param player_ids: Ensemble des IDs de joueurs modifiés
+        """
+        if not player_ids:
+            return
+        query = f"""
+        INSERT INTO LeaderboardDirty (player_id) VALUES {", ".join(["(%s)"] * len(player_ids))}
+        ON DUPLICATE KEY UPDATE marked_at = CURRENT_TIMESTAMP(6)
+        """
+        cursor.execute(query, list(player_ids))
+
+    def refresh_leaderboard_snapshot(self, batch_size=500):
+        """
+        Recalcule LeaderboardSnapshot pour les seuls joueurs marqués dans LeaderboardDirty.
+
+        Le score moyen d'un joueur est la moyenne des scores de dangerosité de ses champions
+        joués au moins 10 fois ; il est éligible au classement avec au moins 100 parties
+        sur ces champions et au moins 10 champions.
+
+        :param batch_size: Nombre de joueurs recalculés par transaction
+        :return: Nombre de joueurs recalculés
+        """
+        started_at = self.fetch_query("SELECT NOW(6) AS now")[0]['now']
+        dirty_ids = [row['player_id'] for row in self.fetch_query("SELECT player_id FROM LeaderboardDirty WHERE marked_at <= %s", (started_at,))]
+
+        for i in range(0, len(dirty_ids), batch_size):
+            chunk = dirty_ids[i:i + batch_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            query = f"""
+            SELECT player_id, champion_id,
+                   SUM(games) as games_played, SUM(wins) as wins, SUM(losses) as losses,
+                   SUM(kills) as total_kills, SUM(deaths) as total_deaths,
+                   SUM(assists) as total_assists, SUM(team_kills) as total_team_kills
+            FROM PlayerChampionStats
+            WHERE player_id IN ({placeholders})
+            GROUP BY player_id, champion_id
+            HAVING games_played >= 10
+            """
+            rows = self.fetch_query(query, chunk)
+            # Tous les champions du lot sont notés en une seule passe
+            scores = self._score_rows(rows)[3]
+
+            totals = {}
+            for row, score in zip(rows, scores):
+                player = totals.setdefault(row['player_id'], {
+                    'champions': 0, 'games': 0, 'wins': 0, 'losses': 0,
+                    'kills': 0, 'deaths': 0, 'assists': 0, 'team_kills': 0, 'scores': []
+                })
+                player['champions'] += 1
+                player['games'] += int(row['games_played'])
+                player['wins'] += int(row['wins'])
+                player['losses'] += int(row['losses'])
+                player['kills'] += int(row['total_kills'] or 0)
+                player['deaths'] += int(row['total_deaths'] or 0)
+                player['assists'] += int(row['total_assists'] or 0)
+                player['team_kills'] += int(row['total_team_kills'] or 0)
+                player['scores'].append(score)
+
+            snapshot_rows = []
+            for player_id, player in totals.items():
+                snapshot_rows.append((
+                    player_id,
+                    player['champions'],
+                    player['games'],
+                    player['wins'],
+                    player['losses'],
+                    round(100 * player['wins'] / player['games'], 2),
+                    round((player['kills'] + player['assists']) / max(1, player['deaths']), 2),
+                    round((player['kills'] + player['assists']) / max(1, player['team_kills']) * 100, 2),
+                    round(sum(player['scores']) / len(player['scores']), 2),
+                    player['games'] >= 100 and player['champions'] >= 10
+                ))
+
+            try:
+                cursor = self.connection.cursor()
+                # Les joueurs sans champion qualifié sortent du classement
+                cursor.execute(f"DELETE FROM LeaderboardSnapshot WHERE player_id IN ({placeholders})", chunk)
+                if snapshot_rows:
+                    cursor.executemany("""
+                    INSERT INTO LeaderboardSnapshot
+                        (player_id, total_champions, total_games, total_wins, total_losses,
+                         overall_winrate, overall_kda, overall_kp, average_score, eligible)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """, snapshot_rows)
+                # Un joueur re-marqué pendant le calcul reste à recalculer au prochain passage
+                cursor.execute(f"DELETE FROM LeaderboardDirty WHERE player_id IN ({placeholders}) AND marked_at <= %s", chunk + [started_at])
+                self.connection.commit()
+                cursor.close()
+            except Error as e:
+                ic(f"Erreur SQL lors du calcul du classement: {e}")
+                self.connection.rollback()
+                raise Exception(f"Erreur SQL: {e}")
+
+        return len(dirty_ids)
+
     def get_top_players_by_score(self, limit=50):
         """
-        Récupère les meilleurs joueurs classés par leur score moyen
+        Récupère les meilleurs joueurs classés par leur score moyen, depuis LeaderboardSnapshot.
         Le score moyen est calculé comme la moyenne des scores de dangerosité de tous leurs champions
+        (voir refresh_leaderboard_snapshot).
         """
         query = """
-        WITH ChampionScores AS (
-            SELECT 
-                g.player_id,
-                c.id as champion_id,
-                c.name as champion_name,
-                COUNT(*) as games_played,
-                SUM(CASE WHEN g.win = 1 THEN 1 ELSE 0 END) as wins,
-                SUM(CASE WHEN g.win = 0 THEN 1 ELSE 0 END) as losses,
-                SUM(g.kills) as total_kills,
-                SUM(g.death) as total_deaths,
-                SUM(g.assists) as total_assists,
-                SUM(g.total_team_kill) as total_team_kills,
-                
-                -- Calcul du winrate
-                ROUND(100 * SUM(CASE WHEN g.win = 1 THEN 1 ELSE 0 END) / COUNT(*), 2) as winrate,
-                
-                -- Calcul du KDA
-                ROUND((SUM(g.kills) + SUM(g.assists)) / GREATEST(1, SUM(g.death)), 2) as kda,
-                
-                -- Calcul de la kill participation
-                ROUND((SUM(g.kills) + SUM(g.assists)) / GREATEST(1, SUM(g.total_team_kill)) * 100, 2) as kill_participation,
-                
-                -- Calcul du score de dangerosité (nouvelle formule simplifiée)
-                CASE 
-                    WHEN COUNT(*) = 0 THEN 0
-                    ELSE (
-                        -- 1. Performance micro (faible influence)
-                        -- kda_score = min(kda / 10, 1) normalisé et plafonné à 1
-                        -- kp_score = kill_participation / 100 entre 0 et 1
-                        -- micro_performance = (0.4 * kda_score + 0.6 * kp_score) * 100
-                        
-                        -- 2. Efficacité (winrate non linéaire)
-                        -- winrate_factor = 1 / (1 + exp(-(winrate - 50) / 5))
-                        -- efficiency = 100 * winrate_factor
-                        
-                        -- 3. Fiabilité (nombre de parties)
-                        -- raw_confidence = 1 / (1 + exp(-(nb_parties - 10) / 2))
-                        -- confidence = 0.3 + 0.7 * raw_confidence (min 0.3, max 1)
-                        
-                        -- 4. Score global
-                        -- score = 0.65 * efficiency + 0.25 * micro_performance + 0.18 * nb_parties
-                        -- score *= confidence
-                        
-                        ROUND(
-                            (
-                                0.65 * 100 * (1 / (1 + EXP(-(ROUND(100 * SUM(CASE WHEN g.win = 1 THEN 1 ELSE 0 END) / COUNT(*), 2) - 50) / 5))) +
-                                0.25 * (
-                                    0.6 * LEAST(ROUND((SUM(g.kills) + SUM(g.assists)) / GREATEST(1, SUM(g.death)), 2) / 10, 1) +
-                                    0.4 * (ROUND((SUM(g.kills) + SUM(g.assists)) / GREATEST(1, SUM(g.total_team_kill)) * 100, 2) / 100)
-                                ) * 100 +
-                                0.18 * COUNT(*)
-                            ) * (0.3 + 0.7 * (1 / (1 + EXP(-(COUNT(*) - 10) / 2))))
-                        , 2)
-                    )
-                END as dangerousness_score
-            FROM Games g
-            JOIN Champion c ON g.champion_id = c.id
-            GROUP BY g.player_id, c.id, c.name
-            HAVING games_played >= 10
-        ),
-        PlayerScores AS (
-            SELECT 
-                cs.player_id,
-                COUNT(DISTINCT cs.champion_id) as total_champions,
-                SUM(cs.games_played) as total_games,
-                SUM(cs.wins) as total_wins,
-                SUM(cs.losses) as total_losses,
-                ROUND(100 * SUM(cs.wins) / SUM(cs.games_played), 2) as overall_winrate,
-                ROUND((SUM(cs.total_kills) + SUM(cs.total_assists)) / GREATEST(1, SUM(cs.total_deaths)), 2) as overall_kda,
-                ROUND((SUM(cs.total_kills) + SUM(cs.total_assists)) / GREATEST(1, SUM(cs.total_team_kills)) * 100, 2) as overall_kp,
-                ROUND(AVG(cs.dangerousness_score), 2) as average_score
-            FROM ChampionScores cs
-            GROUP BY cs.player_id
-        )
         SELECT 
             p.id,
             p.name,
@@ -982,18 +1267,18 @@ class DataBase:
             p.puuid,
             p.soloq,
             p.flex,
-            ps.total_champions,
-            ps.total_games,
-            ps.total_wins,
-            ps.total_losses,
-            ps.overall_winrate,
-            ps.overall_kda,
-            ps.overall_kp,
-            ps.average_score
-        FROM PlayerScores ps
-        JOIN Player p ON ps.player_id = p.id
-        WHERE ps.total_games >= 100 AND ps.total_champions >= 10
-        ORDER BY ps.average_score DESC
+            ls.total_champions,
+            ls.total_games,
+            ls.total_wins,
+            ls.total_losses,
+            ls.overall_winrate,
+            ls.overall_kda,
+            ls.overall_kp,
+            ls.average_score
+        FROM LeaderboardSnapshot ls
+        JOIN Player p ON ls.player_id = p.id
+        WHERE ls.eligible = 1
+        ORDER BY ls.average_score DESC
         LIMIT %s
         """
         
@@ -0,0 +1,66 @@
+import os
+import time
+from dotenv import load_dotenv
+from icecream import ic
+
+load_dotenv()
+
+# Nombre de matchs accumulés avant une écriture groupée
+GAME_BATCH_SIZE = int(os.getenv("GAME_BATCH_SIZE", "200"))
+# Délai maximum (en secondes) avant d'écrire les matchs en attente
+GAME_BATCH_INTERVAL = float(os.getenv("GAME_BATCH_INTERVAL", "2"))
+
+
+class GameBatchWriter:
+    """
+    Accumule les matchs à insérer et les écrit par lots via DataBase.insert_games.
+
+    Expose la même méthode insert_game que DataBase : Player.add_data_to_db peut
+    donc écrire indifféremment dans l'un ou l'autre. Un lot est écrit dès qu'il
+    atteint GAME_BATCH_SIZE matchs ou que GAME_BATCH_INTERVAL secondes se sont
+    écoulées depuis la dernière écriture, puis à la fermeture du writer.
+    """
+
+    def __init__(self, db, batch_size=GAME_BATCH_SIZE, flush_interval=GAME_BATCH_INTERVAL):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.inserted = 0
+        self.failed = False  # Un lot au moins n'a pas pu être écrit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def insert_game(self, date, type_game, win, role, kill, death, assists, total_team_kill, player_id, champion_id, id_match):
+        """Ajoute un match au lot en cours."""
+        self.pending.append({
+            "date": date, "type_game": type_game, "win": win, "role": role, "kill": kill, "death": death,
+            "assists": assists, "total_team_kill": total_team_kill, "player_id": player_id,
+            "champion_id": champion_id, "id_match": id_match,
+        })
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Écrit les matchs en attente dans une seule transaction.
+
+        :return: Nombre de lignes insérées (les doublons sont ignorés)
+        """
+        games, self.pending = self.pending, []
+        self.last_flush = time.monotonic()
+        if not games:
+            return 0
+        try:
+            inserted = self.db.insert_games(games)
+        except Exception:
+            self.failed = True
+            raise
+        self.inserted += inserted
+        ic(f"{inserted}/{len(games)} matchs insérés")
+        return inserted
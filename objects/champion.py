@@ -1,6 +1,13 @@
-import math
+from utils.scoring import score_champion
 
 class Champion:
+    """
+    Accumulateur des statistiques d'un joueur sur un champion.
+    Les métriques dérivées (winrate, dangerosité) ne sont calculées qu'à la lecture,
+    une seule fois tant que les totaux ne changent pas.
+    """
+    __slots__ = ("nom", "kill", "death", "assit", "nombre_win", "nombre_lose", "team_kills", "_scores")
+
     def __init__(self, nom):
         self.nom = nom
         self.kill = 0
@@ -8,84 +15,80 @@ class Champion:
         self.assit = 0
         self.nombre_win = 0
         self.nombre_lose = 0
-        self.nombre_de_parties = 0
-        self.winrate = None
-        self.dangerousness = None
         self.team_kills = 0
+        self._scores = None  # (winrate, dangerousness) calculés à la demande
+
+    @property
+    def nombre_de_parties(self):
+        return self.nombre_win + self.nombre_lose
+
+    @property
+    def winrate(self):
+        return self._get_scores()[0]
+
+    @property
+    def dangerousness(self):
+        return self._get_scores()[1]
+
+    def _get_scores(self):
+        if self._scores is None:
+            if self.nombre_de_parties == 0:
+                self._scores = (None, None)
+            else:
+                self._scores = (self.calculates_winrate(), self.calculates_dangerousness())
+        return self._scores
 
     def calculates_winrate(self):
         return round(100 * self.nombre_win / (self.nombre_win + self.nombre_lose), 2)
 
     def calculates_dangerousness(self):
-        if self.nombre_de_parties == 0:
-            return 0
-
-        # --- 1. Performance micro (faible influence) ---
-        kda_score = min(self.get_kda() / 10, 1)  # normalisé, plafonné à 1
-        kp_score = self.get_kill_participation() / 100  # entre 0 et 1
-        micro_performance = (0.6 * kda_score + 0.4 * kp_score) * 100
-
-        # --- 2. Efficacité (winrate non linéaire) ---
-        winrate_factor = 1 / (1 + math.exp(-(self.winrate - 50) / 5))
-        efficiency = 100 * winrate_factor
-
-        # --- 3. Fiabilité (nombre de parties) ---
-        raw_confidence = 1 / (1 + math.exp(-(self.nombre_de_parties - 10) / 2))
-        confidence = 0.3 + 0.7 * raw_confidence  # min 0.3, max 1
-
-        # --- 4. Bonus par paliers de 25 parties ---
-        # 0–24 → 0
-        # 25–49 → +10
-        # 50–74 → +20
-        # ...
-        # Limité à 100 (modifiable)
-        palier_bonus = (self.nombre_de_parties // 25) * 10
-        palier_bonus = min(palier_bonus, 100)
-
-        # --- 5. Score global ---
-        score = (
-            0.65 * efficiency +        # Winrate : poids principal
-            0.25 * micro_performance + # Micro-perf : poids moyen
-            palier_bonus               # Bonus d’expérience par paliers
-        )
-
-        score *= confidence  # fiabilité (volume) → amplifie les valeurs sûres
-
-        return round(score, 2)
-
-    
+        # Formule commune à toute l'application (voir utils/scoring.py)
+        return score_champion(self.nombre_de_parties, self.nombre_win, self.kill, self.death, self.assit, self.team_kills)[3]
+
+    def add_game(self, win, kill, death, assit, team_kills):
+        """Ajoute un match d'un coup (chemin rapide de Player.build_stats)."""
+        if win:
+            self.nombre_win += 1
+        else:
+            self.nombre_lose += 1
+        self.kill += kill
+        self.death += death
+        self.assit += assit
+        self.team_kills += team_kills
+        self._scores = None
+
     def add_win(self, nombre_win):
         self.nombre_win += nombre_win
-        self.nombre_de_parties += nombre_win
-        self.winrate = self.calculates_winrate()
-        self.dangerousness = self.calculates_dangerousness()
+        self._scores = None
 
     def add_lose(self, nombre_lose):
         self.nombre_lose += nombre_lose
-        self.nombre_de_parties += nombre_lose
-        self.winrate = self.calculates_winrate()
-        self.dangerousness = self.calculates_dangerousness()
+        self._scores = None
 
     def get_kda(self):
         return round((self.kill + self.assit) / max(1, self.death), 2)
-    
+
     def get_kill_participation(self):
         return round((self.kill + self.assit) / max(1, self.team_kills)* 100, 2)
 
     def add_kill(self, nb_kill):
         self.kill += nb_kill
+        self._scores = None
 
     def add_death(self, nb_death):
         self.death += nb_death
+        self._scores = None
 
     def add_assit(self, nb_assit):
         self.assit += nb_assit
+        self._scores = None
 
     def add_team_kills(self, team_kills):
         self.team_kills += team_kills
-    
+        self._scores = None
+
     def __eq__(self, __value: object) -> bool:
         return self.nom == __value.nom
-    
+
     def __hash__(self) -> int:
-        return hash(self.nom)
\ No newline at end of file
+        return hash(self.nom)
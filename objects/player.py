@@ -1,23 +1,115 @@
-import requests, time
 from tabulate import tabulate
 from objects.champion import Champion
+from utils.riot_client import riot_client
+from utils.ratelimit import rate_limiter
+from utils.match_store import match_store
 from datetime import datetime
 
 from icecream import ic
 
+# Files classées suivies : queueType Riot -> préfixe des colonnes de rang de la table Player
+RANKED_QUEUES = {"RANKED_SOLO_5x5": "soloq", "RANKED_FLEX_SR": "flex"}
+RANK_FIELDS = ("tier", "rank", "lp", "wins", "losses")
+
 class Player:
     def __init__(self, name, tag, API_KEY):
+        """
+        Aucun appel à l'API n'est fait ici : le PUUID, les rangs et les détails du summoner
+        sont résolus au premier accès aux propriétés correspondantes.
+        """
+        self.__init_attributes(name, tag, API_KEY)
+
+    @classmethod
+    def from_record(cls, record, API_KEY):
+        """
+        Construit un joueur à partir de sa ligne de la table Player, sans aucun appel à l'API.
+
+        :param record: Dictionnaire issu de DataBase.get_player
+        :param API_KEY: Clé API Riot (utilisée pour les appels ultérieurs)
+        :return: Objet Player
+        """
+        player = cls(record["name"], record["tag"], API_KEY)
+        player.puuid = record["puuid"]
+        player.soloq = record.get("soloq")
+        player.flexq = record.get("flex")
+        player.ranks = {
+            prefix: {field: record.get(f"{prefix}_{field}") for field in RANK_FIELDS}
+            for prefix in RANKED_QUEUES.values()
+            if record.get(f"{prefix}_tier")
+        }
+        return player
+
+    # ==================== PROPRIÉTÉS RÉSOLUES À LA DEMANDE ====================
+
+    def __resolve(self, key, loader):
+        if key not in self._resolved:
+            self._resolved.add(key)  # Avant l'appel : le loader peut relire les propriétés
+            loader()
+
+    @property
+    def puuid(self):
+        if "puuid" not in self._resolved:
+            self._resolved.add("puuid")
+            self._puuid = self.__get_puuid()
+        return self._puuid
+
+    @puuid.setter
+    def puuid(self, value):
+        self._resolved.add("puuid")
+        self._puuid = value
+
+    @property
+    def soloq(self):
+        self.__resolve("rank", self.__get_rank)
+        return self._soloq
+
+    @soloq.setter
+    def soloq(self, value):
+        self._resolved.add("rank")
+        self._soloq = value
+
+    @property
+    def flexq(self):
+        self.__resolve("rank", self.__get_rank)
+        return self._flexq
+
+    @flexq.setter
+    def flexq(self, value):
+        self._resolved.add("rank")
+        self._flexq = value
+
+    @property
+    def ranks(self):
+        self.__resolve("rank", self.__get_rank)
+        return self._ranks
+
+    @ranks.setter
+    def ranks(self, value):
+        self._resolved.add("rank")
+        self._ranks = value
+
+    @property
+    def profileIconId(self):
+        self.__resolve("summoner", self.__get_summoner_details)
+        return self._profile_icon_id
+
+    @property
+    def summonerLevel(self):
+        self.__resolve("summoner", self.__get_summoner_details)
+        return self._summoner_level
+
+    def __init_attributes(self, name, tag, API_KEY):
         self.name = name
         self.tag = tag
         self.API_KEY = API_KEY # TODO: Move the way to call API
-        self.champions = []
-        self.puuid = self.__get_puuid()
-        self.soloq = None
-        self.flexq = None
-        self.__get_rank() # Will set self.soloq and self.flexq
-        self.profileIconId = None
-        self.summonerLevel = None
-        self.__get_summoner_details() # Will set profileIconId and summonerLevel
+        self.champions = {} # nom du champion -> Champion
+        self._resolved = set() # Propriétés déjà résolues ("puuid", "rank", "summoner")
+        self._puuid = None
+        self._soloq = None
+        self._flexq = None
+        self._ranks = {} # "soloq"/"flex" -> {tier, rank, lp, wins, losses}
+        self._profile_icon_id = None
+        self._summoner_level = None
         self.global_kda = 0
         self.global_kill = 0
         self.global_death = 0
@@ -32,24 +124,27 @@ class Player:
         self.score_moyen = 0
 
 
-    def __get_puuid(self, retry_count=0):
-        # Limite de tentatives pour éviter la récursion infinie
-        if retry_count >= 10:
-            print(f"Nombre maximum de tentatives atteint pour récupérer le PUUID")
-            return False
-            
+    def __call_api(self, url):
+        """
+        Appelle l'API Riot via le client HTTP partagé (connexions keep-alive, timeouts).
+        Chaque appel réserve un slot dans le rate limiter global, qui gère aussi
+        les retries en cas de 429 ou d'erreur réseau.
+
+        :param url: URL complète de l'endpoint
+        :return: Objet Response, ou None si la requête n'a pas pu aboutir
+        """
+        try:
+            return rate_limiter.make_request_with_retry(riot_client.get, url, api_key=self.API_KEY)
+        except Exception as e:
+            print(f"Erreur lors de l'appel à {url}: {e}")
+            return None
+
+    def __get_puuid(self):
         url = f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{self.name}/{self.tag}"
-        headers = {"X-Riot-Token": self.API_KEY}
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 429:
-            print(f"Rate limit atteint pour PUUID, tentative {retry_count + 1}/5")
-            # Attendre plus longtemps pour les rate limits (5-30 secondes)
-            wait_time = min(5 + (retry_count * 5), 30)  # 5s, 10s, 15s, 20s, 25s, 30s max
-            print(f"Attente de {wait_time} secondes...")
-            time.sleep(wait_time)
-            return self.__get_puuid(retry_count + 1)
-        
+        response = self.__call_api(url)
+        if response is None:
+            return False
+
         if response.status_code != 200:
             print(f"Erreur {response.status_code}: {response.json()}")
             return False
@@ -57,30 +152,17 @@ class Player:
         if response.json().get("puuid", None) is None:
             return False
 
-        self.puuid = response.json()["puuid"]
-        return self.puuid
+        return response.json()["puuid"]
     
 
-    def __get_rank(self, retry_count=0):
-        if self.puuid is None: return False
+    def __get_rank(self):
+        if not self.puuid: return False
         
-        # Limite de tentatives pour éviter la récursion infinie
-        if retry_count >= 10:
-            print(f"Nombre maximum de tentatives atteint pour récupérer le rank")
-            return None
-            
         url = f"https://euw1.api.riotgames.com/lol/league/v4/entries/by-puuid/{self.puuid}"
-        headers = {"X-Riot-Token": self.API_KEY}
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 429:
-            print(f"Rate limit atteint pour rank, tentative {retry_count + 1}/5")
-            # Attendre plus longtemps pour les rate limits (5-30 secondes)
-            wait_time = min(5 + (retry_count * 5), 30)  # 5s, 10s, 15s, 20s, 25s, 30s max
-            print(f"Attente de {wait_time} secondes...")
-            time.sleep(wait_time)
-            return self.__get_rank(retry_count + 1)
-            
+        response = self.__call_api(url)
+        if response is None:
+            return None
+
         if response.status_code != 200:
             print(f"Erreur {response.status_code}: {response.json()}")
             return None
@@ -88,41 +170,62 @@ class Player:
         rank_data = response.json()
 
         for queue in rank_data:
-            if queue["queueType"] == "RANKED_SOLO_5x5":
-                self.soloq = f"{queue['tier']} {queue['rank']} ({queue['leaguePoints']} LP) - {queue['wins']}W/{queue['losses']}L (Winrate: {queue['wins'] / (queue['wins'] + queue['losses']) * 100:.2f}%)"
-            elif queue["queueType"] == "RANKED_FLEX_SR":
-                self.flexq = f"{queue['tier']} {queue['rank']} ({queue['leaguePoints']} LP) - {queue['wins']}W/{queue['losses']}L (Winrate: {queue['wins'] / (queue['wins'] + queue['losses']) * 100:.2f}%)"	
+            prefix = RANKED_QUEUES.get(queue["queueType"])
+            if prefix is None:
+                continue
+            self._ranks[prefix] = {
+                "tier": queue["tier"],
+                "rank": queue["rank"],
+                "lp": queue["leaguePoints"],
+                "wins": queue["wins"],
+                "losses": queue["losses"],
+            }
+            if prefix == "soloq":
+                self._soloq = self.format_rank(self._ranks[prefix])
+            else:
+                self._flexq = self.format_rank(self._ranks[prefix])
+
+        return self._soloq, self._flexq
+
+    def refresh_rank(self):
+        """
+        Relit les rangs classés du joueur depuis l'API (un joueur qui n'est plus classé perd son rang).
 
-        return self.soloq, self.flexq
+        :return: Tuple (soloq, flexq), ou None si l'API n'a pas répondu
+        """
+        self._resolved.add("rank")
+        previous = self._soloq, self._flexq, self._ranks
+        self._soloq, self._flexq, self._ranks = None, None, {}
+        if self.__get_rank() is None:
+            self._soloq, self._flexq, self._ranks = previous
+            return None
+        return self._soloq, self._flexq
+
+    @staticmethod
+    def format_rank(entry):
+        """
+        Texte d'un rang tel qu'affiché par le frontend.
+
+        :param entry: Dictionnaire avec tier, rank, lp, wins et losses
+        :return: Exemple: "GOLD III (48 LP) - 17W/17L (Winrate: 50.00%)"
+        """
+        return f"{entry['tier']} {entry['rank']} ({entry['lp']} LP) - {entry['wins']}W/{entry['losses']}L (Winrate: {entry['wins'] / (entry['wins'] + entry['losses']) * 100:.2f}%)"
     
-    def __get_summoner_details(self, retry_count=0):
+    def __get_summoner_details(self):
         """
         Récupère les détails du summoner (profileIconId et summonerLevel) à partir du PUUID.
         Utilise l'endpoint GET /lol/summoner/v4/summoners/by-puuid/{puuid}
         
-        :param retry_count: Nombre de tentatives déjà effectuées
         :return: Tuple (profileIconId, summonerLevel) ou (None, None) si erreur
         """
-        if self.puuid is None:
-            return None, None
-            
-        # Limite de tentatives pour éviter la récursion infinie
-        if retry_count >= 10:
-            print(f"Nombre maximum de tentatives atteint pour récupérer les détails du summoner")
+        if not self.puuid:
             return None, None
             
         url = f"https://euw1.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{self.puuid}"
-        headers = {"X-Riot-Token": self.API_KEY}
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 429:
-            print(f"Rate limit atteint pour les détails du summoner, tentative {retry_count + 1}/10")
-            # Attendre plus longtemps pour les rate limits (5-30 secondes)
-            wait_time = min(5 + (retry_count * 5), 30)  # 5s, 10s, 15s, 20s, 25s, 30s max
-            print(f"Attente de {wait_time} secondes...")
-            time.sleep(wait_time)
-            return self.__get_summoner_details(retry_count + 1)
-            
+        response = self.__call_api(url)
+        if response is None:
+            return None, None
+
         if response.status_code != 200:
             print(f"Erreur {response.status_code}: {response.json()}")
             return None, None
@@ -130,37 +233,24 @@ class Player:
         summoner_data = response.json()
         
         # Récupérer profileIconId et summonerLevel
-        self.profileIconId = summoner_data.get("profileIconId")
-        self.summonerLevel = summoner_data.get("summonerLevel")
+        self._profile_icon_id = summoner_data.get("profileIconId")
+        self._summoner_level = summoner_data.get("summonerLevel")
         
-        return self.profileIconId, self.summonerLevel
+        return self._profile_icon_id, self._summoner_level
 
-    def get_account_by_puuid(self, puuid, retry_count=0):
+    def get_account_by_puuid(self, puuid):
         """
         Récupère les informations de compte (nom et tag) à partir d'un PUUID.
         Utilise l'endpoint GET /riot/account/v1/accounts/by-puuid/{puuid}
         
         :param puuid: PUUID du joueur
-        :param retry_count: Nombre de tentatives déjà effectuées
         :return: Dictionnaire avec gameName et tagLine, ou None si erreur
         """
-        # Limite de tentatives pour éviter la récursion infinie
-        if retry_count >= 10:
-            print(f"Nombre maximum de tentatives atteint pour récupérer le compte par PUUID")
-            return None
-            
         url = f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-puuid/{puuid}"
-        headers = {"X-Riot-Token": self.API_KEY}
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 429:
-            print(f"Rate limit atteint pour compte par PUUID, tentative {retry_count + 1}/10")
-            # Attendre plus longtemps pour les rate limits (5-30 secondes)
-            wait_time = min(5 + (retry_count * 5), 30)  # 5s, 10s, 15s, 20s, 25s, 30s max
-            print(f"Attente de {wait_time} secondes...")
-            time.sleep(wait_time)
-            return self.get_account_by_puuid(puuid, retry_count + 1)
-            
+        response = self.__call_api(url)
+        if response is None:
+            return None
+
         if response.status_code != 200:
             print(f"Erreur {response.status_code}: {response.json()}")
             return None
@@ -179,197 +269,185 @@ class Player:
         }
 
 
-    def get_matchs_history(self, start_time=None, end_time=None, match_type=None, start=0, count=20, matchs=None, retry_count=0):
+    def iter_matchs_history(self, start_time=None, end_time=None, match_type=None, count=20, stop=None, page_size=100, outcome=None):
         """
-        Récupère la liste des matchs d'un joueur à partir de son PUUID.
+        Parcourt la liste des matchs d'un joueur page par page, du plus récent au plus ancien.
+        Chaque page est rendue dès sa réception : l'appelant peut commencer à traiter
+        la première page pendant que les suivantes sont listées. Les retries sur 429
+        sont gérés par le rate limiter global.
 
-        :param puuid: Identifiant unique du joueur (PUUID)
         :param start_time: (Optionnel) Les datas des matchs disponibles commencent le 01/01/2023 (Linux Timestamp en secondes)
         :param end_time: (Optionnel) Linux Timestamp de fin en secondes pour la recherche
-        :param queue: (Optionnel) ID de la file (ex: 420 pour Ranked Solo/Duo)
-        :param match_type: (Optionnel) Type de match (ex: "ranked", "normal", "tourney")
-        :param start: (Optionnel) Index de départ (par défaut: 0)
-        :param count: (Optionnel) Nombre de matchs à récupérer (1-100, par défaut: 20)
-        :param matchs: (Optionnel) Liste des matchs déjà récupérés
-        :param retry_count: (Optionnel) Nombre de tentatives déjà effectuées
+        :param match_type: (Optionnel) Type de match (ex: "ranked", "normal", "tourney") ou ID de file (ex: 420)
+        :param count: (Optionnel) Nombre maximum de matchs à lister (par défaut: 20, None pour aucune limite)
+        :param stop: (Optionnel) Prédicat sur un ID de match : la pagination s'arrête au premier ID pour lequel il est vrai (exclu)
+        :param page_size: (Optionnel) Nombre de matchs par page (1-100)
+        :param outcome: (Optionnel) Dictionnaire dont la clé "complete" passe à True si la liste a été parcourue
+                        jusqu'au bout (prédicat d'arrêt, dernière page incomplète) ; elle reste False si la limite
+                        count est atteinte, si une page est en erreur ou si l'appelant arrête la lecture
+        :yield: Liste des IDs des matchs d'une page
+        """
+        if outcome is not None:
+            outcome["complete"] = False
+        listed = 0
+        while count is None or listed < count:
+            nb_matchs = min(page_size, 100) if count is None else min(count - listed, page_size, 100)
+            url = f"https://europe.api.riotgames.com/lol/match/v5/matches/by-puuid/{self.puuid}/ids?start={listed}&count={nb_matchs}"
+
+            if start_time:
+                url += f"&startTime={start_time}"
+            if end_time:
+                url += f"&endTime={end_time}"
+            if match_type:
+                if isinstance(match_type, str):
+                    url += f"&type={match_type}"
+                elif isinstance(match_type, int):
+                    url += f"&queue={match_type}"
+                else:
+                    ic(f"Issue on match type {match_type}")
+
+            print(url)
+            response = self.__call_api(url)
+            if response is None:
+                return
+
+            if response.status_code != 200:
+                print(f"Erreur {response.status_code}: {response.json()}")
+                return
+
+            new_matchs = response.json()
+            if len(new_matchs) == 0:
+                if outcome is not None:
+                    outcome["complete"] = True
+                return
+
+            # Les matchs sont triés du plus récent au plus ancien : tout ce qui suit l'arrêt est ignoré
+            if stop is not None:
+                for index, match_id in enumerate(new_matchs):
+                    if stop(match_id):
+                        if outcome is not None:
+                            outcome["complete"] = True
+                        if index:
+                            yield new_matchs[:index]
+                        return
+
+            listed += len(new_matchs)
+            print(f"Récupération des matchs ({match_type}) {listed}/{count}")
+            last_page = len(new_matchs) < nb_matchs
+            if last_page and outcome is not None:
+                outcome["complete"] = True
+            yield new_matchs
+
+            if last_page:
+                return
+
+    def get_matchs_history(self, start_time=None, end_time=None, match_type=None, count=20, known_ids=None):
+        """
+        Récupère la liste des matchs d'un joueur à partir de son PUUID (voir iter_matchs_history).
+
+        :param start_time: (Optionnel) Linux Timestamp de début en secondes
+        :param end_time: (Optionnel) Linux Timestamp de fin en secondes
+        :param match_type: (Optionnel) Type de match ou ID de file
+        :param count: (Optionnel) Nombre de matchs à récupérer (par défaut: 20)
+        :param known_ids: (Optionnel) IDs déjà ingérés : la pagination s'arrête au premier rencontré
         :return: Liste des IDs des matchs
         """
-        # Initialiser matchs si None
-        if matchs is None:
-            matchs = []
-            
-        # Limite de tentatives pour éviter la récursion infinie
-        if retry_count >= 10:
-            print(f"Nombre maximum de tentatives atteint pour l'historique des matchs")
-            return matchs
+        stop = (lambda match_id: match_id in known_ids) if known_ids else None
+        return [
+            match_id
+            for page in self.iter_matchs_history(start_time, end_time, match_type, count, stop=stop)
+            for match_id in page
+        ]
+    
+    def get_match_data(self, match_id):
+        """
+        Récupère le payload match-v5 brut d'un match.
+        Les matchs terminés étant immuables, le payload est lu dans le stockage local
+        s'il a déjà été téléchargé, et y est ajouté sinon.
 
-        if count < 100:
-            nb_matchs = count
-        else:
-            nb_matchs = 100
-
-        url = f"https://europe.api.riotgames.com/lol/match/v5/matches/by-puuid/{self.puuid}/ids?start={start}&count={nb_matchs}"
-
-        if start_time:
-            url += f"&startTime={start_time}"
-        if end_time:
-            url += f"&endTime={end_time}"
-        if match_type:
-            if isinstance(match_type, str):
-                url += f"&type={match_type}"
-            elif isinstance(match_type, int):
-                url += f"&queue={match_type}"
-            else:
-                ic(f"Issue on match type {match_type}")
+        :param match_id: ID du match
+        :return: Dictionnaire match-v5, ou None en cas d'erreur
+        """
+        match_data = match_store.get(match_id)
+        if match_data is not None:
+            return match_data
+
+        url = f"https://europe.api.riotgames.com/lol/match/v5/matches/{match_id}"
+        response = self.__call_api(url)
+        if response is None:
+            return None
 
-        headers = {"X-Riot-Token": self.API_KEY}
-        print(url, headers)
-        response = requests.get(url, headers=headers)
-        
-        # Gestion des erreurs de rate limit avec retry intelligent
-        if response.status_code == 429:
-            print(f"Rate limit atteint pour l'historique, tentative {retry_count + 1}/10")
-            
-            # Récupération des headers de rate limit
-            retry_after = response.headers.get('Retry-After')
-            x_rate_limit_type = response.headers.get('X-Rate-Limit-Type', '')
-            
-            # Calcul du temps d'attente basé sur les headers API
-            if retry_after:
-                wait_time = int(retry_after)
-                print(f"API recommande d'attendre {wait_time}s")
-            else:
-                # Attente progressive basée sur le type de rate limit
-                if 'application' in x_rate_limit_type.lower():
-                    wait_time = 60  # 1 minute pour rate limit application
-                elif 'method' in x_rate_limit_type.lower():
-                    wait_time = 30  # 30 secondes pour rate limit méthode
-                else:
-                    wait_time = min(5 + (retry_count * 3), 30)  # 5s, 8s, 11s, 14s, 17s, 20s, 23s, 26s, 29s, 30s max
-            
-            print(f"Attente de {wait_time} secondes...")
-            time.sleep(wait_time)
-            return self.get_matchs_history(start_time, end_time, match_type, start, count, matchs, retry_count + 1)
-        
         if response.status_code != 200:
             print(f"Erreur {response.status_code}: {response.json()}")
-            return matchs
-
-        new_matchs = response.json()
-
-        if len(new_matchs) == 0:
-            return matchs
+            ic(match_id)
+            return None
 
-        matchs.extend(new_matchs)
+        match_data = response.json()
+        match_store.put(match_id, match_data)
+        return match_data
 
-        if len(matchs) < count:
-            print(f"Récupération des matchs ({match_type}) {len(matchs)}/{count}")
-            return self.get_matchs_history(start_time, end_time, match_type, len(matchs), count, matchs, 0)  # Reset retry_count for pagination
-        
-        return matchs
-    
-    def get_match_info(self, match_id, retry_count=0):
+    def get_match_info(self, match_id):
         """
         Récupère les informations d'un match à partir de son ID.
 
         :param match_id: ID du match
-        :param retry_count: Nombre de tentatives déjà effectuées
         :return: Informations du match (Champions, KDA, Kill, death, assist, DPM, gameLength, KillParticipation, VisionScore, CS, Win/Lose)
         """
-        # Limite de tentatives pour éviter la récursion infinie
-        if retry_count >= 10:
-            print(f"Nombre maximum de tentatives atteint pour le match {match_id}")
-            return None
-            
-        url = f"https://europe.api.riotgames.com/lol/match/v5/matches/{match_id}"
-        headers = {"X-Riot-Token": self.API_KEY}
-        
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 429:
-            print(f"Rate limit atteint pour le match {match_id}, tentative {retry_count + 1}/10")
-            
-            # Récupération des headers de rate limit
-            retry_after = response.headers.get('Retry-After')
-            x_rate_limit_type = response.headers.get('X-Rate-Limit-Type', '')
-            
-            # Calcul du temps d'attente basé sur les headers API
-            if retry_after:
-                wait_time = int(retry_after)
-                print(f"API recommande d'attendre {wait_time}s")
-            else:
-                # Attente progressive basée sur le type de rate limit
-                if 'application' in x_rate_limit_type.lower():
-                    wait_time = 60  # 1 minute pour rate limit application
-                elif 'method' in x_rate_limit_type.lower():
-                    wait_time = 30  # 30 secondes pour rate limit méthode
-                else:
-                    wait_time = min(5 + (retry_count * 3), 30)  # 5s, 8s, 11s, 14s, 17s, 20s, 23s, 26s, 29s, 30s max
-            
-            print(f"Attente de {wait_time} secondes...")
-            time.sleep(wait_time)
-            return self.get_match_info(match_id, retry_count + 1)
-        
-        if response.status_code != 200:
-            print(f"Erreur {response.status_code}: {response.json()}")
-            ic(match_id)
+        match_data = self.get_match_data(match_id)
+        if match_data is None:
             return None
 
-        match_data = response.json()
+        return self.get_participants_stats(match_data).get(self.puuid)
 
+    @staticmethod
+    def get_participants_stats(match_data):
+        """
+        Extrait les statistiques des 10 participants d'un match.
+        Un seul téléchargement du match permet ainsi de remplir les parties de
+        tous les joueurs suivis qui y ont participé.
+
+        :param match_data: Dictionnaire match-v5 brut
+        :return: Dictionnaire {puuid: stats}, vide si le match n'est pas pris en compte
+        """
         if match_data["info"]["gameMode"] != "CLASSIC":
-            return None
+            return {}
 
         if len(match_data["metadata"]["participants"]) != 10:
-            return None
+            return {}
         
         if match_data["info"]["gameDuration"] < 300:
-            return None
-        
-        # Total des kills de l'équipe du joueur
-        player_team_id = None
-        total_team_kills = 0
+            return {}
 
-        # Trouver l'équipe du joueur
-        for participant in match_data["info"]["participants"]:
-            if participant["puuid"] == self.puuid:
-                player_team_id = participant["teamId"]
-                break
-
-        if player_team_id is None:
-            return None
+        match_id = match_data["metadata"]["matchId"]
+        date = datetime.fromtimestamp(match_data["info"]["gameCreation"] // 1000).strftime("%Y-%m-%d")
 
-        # Calcul des kills de l'équipe
+        # Total des kills de chaque équipe
+        team_kills = {}
         for participant in match_data["info"]["participants"]:
-            if participant["teamId"] == player_team_id:
-                total_team_kills += participant["kills"]
-
-        date = datetime.fromtimestamp(match_data["info"]["gameCreation"] // 1000).strftime("%Y-%m-%d")
+            team_kills[participant["teamId"]] = team_kills.get(participant["teamId"], 0) + participant["kills"]
 
-        # Trouver les infos du joueur
+        stats_by_puuid = {}
         for participant in match_data["info"]["participants"]:
-            if participant["puuid"] == self.puuid:
-                stats = {
-                    "Champion": participant["championName"],
-                    "Kills": participant["kills"],
-                    "Deaths": participant["deaths"],
-                    "Assists": participant["assists"],
-                    "total_kill": total_team_kills,
-                    "Win": participant["win"],
-                    "TeamPosition": participant["teamPosition"],
-                    "Date": date,
-                    "MatchId": match_id
-                }
-                return stats
+            stats_by_puuid[participant["puuid"]] = {
+                "Champion": participant["championName"],
+                "Kills": participant["kills"],
+                "Deaths": participant["deaths"],
+                "Assists": participant["assists"],
+                "total_kill": team_kills[participant["teamId"]],
+                "Win": participant["win"],
+                "TeamPosition": participant["teamPosition"],
+                "Date": date,
+                "MatchId": match_id
+            }
         
-        return None
+        return stats_by_puuid
     
 
     def add_data_to_db(self, db, player_id, champion_id, game, type_game):
         """
         Ajoute les données d'un match à la base de données.
 
-        :param db: Objet de la base de données
+        :param db: Objet de la base de données (ou GameBatchWriter pour une écriture groupée)
         :param player_id: ID du joueur
         :param champion_id: ID du champion
         :param game: Informations d'un match
@@ -411,45 +489,57 @@ class Player:
         'win': 0}
         """
 
-        champion = Champion(game["champion_name"])
+        champion = self._get_champion(game["champion_name"])
+        champion.add_game(game["win"], game["kills"], game["death"], game["assists"], game["total_team_kill"])
 
-        if champion not in self.champions:
-            self.champions.append(champion)
-        else:
-            champion = self.champions[self.champions.index(champion)]
+        return champion
+    
 
-        if game["win"]:
-            champion.add_win(1)
-        else:
-            champion.add_lose(1)
+    def build_stats_from_aggregate(self, row):
+        """
+        Construit les statistiques d'un champion à partir d'une ligne agrégée
+        (voir DataBase.get_champion_stats), sans parcourir les matchs un par un.
+
+        :param row: Dictionnaire avec champion_name, wins, losses, total_kills, total_deaths, total_assists, total_team_kills
+        """
+        champion = self._get_champion(row["champion_name"])
 
-        champion.add_kill(game["kills"])
-        champion.add_death(game["death"])
-        champion.add_assit(game["assists"])
-        champion.add_team_kills(game["total_team_kill"])
+        champion.add_kill(int(row["total_kills"] or 0))
+        champion.add_death(int(row["total_deaths"] or 0))
+        champion.add_assit(int(row["total_assists"] or 0))
+        champion.add_team_kills(int(row["total_team_kills"] or 0))
+        champion.add_win(int(row["wins"] or 0))
+        champion.add_lose(int(row["losses"] or 0))
 
         return champion
+
+    def _get_champion(self, champion_name):
+        """Accumulateur du champion, créé au premier match rencontré."""
+        champion = self.champions.get(champion_name)
+        if champion is None:
+            champion = self.champions[champion_name] = Champion(champion_name)
+        return champion
     
 
     def get_all_stats(self, role):
         self.role = role
         ic(self.role, role)
         
-        # Filter champions with at least 10 games for score calculation
-        champions_with_min_games = [champion for champion in self.champions if champion.nombre_de_parties >= 10]
-        
-        for champion in self.champions:
-            self.global_kill += champion.kill
-            self.global_death += champion.death
-            self.global_assists += champion.assit
-            self.nb_game += champion.nombre_de_parties
-            self.nb_win += champion.nombre_win
-            self.nb_lose += champion.nombre_lose
-            self.team_kills += champion.team_kills
+        champions = list(self.champions.values())
+
+        # Totaux recalculés à chaque appel : appeler get_all_stats deux fois ne double pas les compteurs
+        self.global_kill = sum(champion.kill for champion in champions)
+        self.global_death = sum(champion.death for champion in champions)
+        self.global_assists = sum(champion.assit for champion in champions)
+        self.nb_win = sum(champion.nombre_win for champion in champions)
+        self.nb_lose = sum(champion.nombre_lose for champion in champions)
+        self.nb_game = self.nb_win + self.nb_lose
+        self.team_kills = sum(champion.team_kills for champion in champions)
 
         # Calculate score moyen only with champions having at least 10 games
+        champions_with_min_games = [champion for champion in champions if champion.nombre_de_parties >= 10]
         if champions_with_min_games:
-            total_score = sum(champion.calculates_dangerousness() for champion in champions_with_min_games)
+            total_score = sum(champion.dangerousness for champion in champions_with_min_games)
             self.score_moyen = round(total_score / len(champions_with_min_games), 2)
         else:
             self.score_moyen = 0
@@ -468,7 +558,7 @@ class Player:
         data = []
         
         min_games_required = 1 if self.nb_game < 50 else (1 + ((self.nb_game // 100 - 1)))
-        for champion in sorted(self.champions, key=lambda x: x.dangerousness, reverse=True):
+        for champion in sorted(self.champions.values(), key=lambda x: x.dangerousness, reverse=True):
             
             if champion.nombre_de_parties < min_games_required: continue
             data.append([
@@ -0,0 +1,194 @@
+import os
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from icecream import ic
+from database.game_writer import GameBatchWriter
+from services.ingestion import fetch_match_details, ingest_match
+
+load_dotenv()
+
+# Début de l'historique à rattraper (les matchs de l'API Riot remontent au 01/01/2023)
+BACKFILL_START_DATE = os.getenv("BACKFILL_START_DATE") or "2023-01-01"
+# Taille (en jours) des fenêtres de temps parcourues indépendamment
+BACKFILL_WINDOW_DAYS = int(os.getenv("BACKFILL_WINDOW_DAYS", "30"))
+# Nombre de fenêtres dont les IDs de matchs sont listés simultanément
+BACKFILL_DISCOVERY_WORKERS = int(os.getenv("BACKFILL_DISCOVERY_WORKERS", "4"))
+# Nombre maximum de matchs listés par fenêtre ; au-delà, la fenêtre est coupée en deux
+BACKFILL_MAX_PER_WINDOW = 1000
+
+_running = {}  # player_id -> threading.Event d'annulation
+_lock = threading.Lock()
+
+
+def backfill_windows(start_time, end_time, window_days=None):
+    """
+    Découpe [start_time, end_time] en fenêtres de temps alignées sur start_time.
+    L'alignement ne dépend pas de end_time : une reprise retrouve les mêmes fenêtres.
+
+    :param start_time: Début (timestamp en secondes)
+    :param end_time: Fin (timestamp en secondes)
+    :param window_days: (Optionnel) Taille des fenêtres en jours (par défaut BACKFILL_WINDOW_DAYS)
+    :return: Liste de tuples (window_start, window_end), de la plus récente à la plus ancienne
+    """
+    step = max(1, int(window_days or BACKFILL_WINDOW_DAYS)) * 86400
+    windows = []
+    window_start = start_time
+    while window_start < end_time:
+        windows.append((window_start, window_start + step))
+        window_start += step
+    return windows[::-1]
+
+
+def start_backfill(player_id):
+    """
+    Enregistre un backfill en cours pour un joueur.
+
+    :return: Event d'annulation, ou None si un backfill est déjà en cours pour ce joueur
+    """
+    with _lock:
+        if player_id in _running:
+            return None
+        cancel_event = _running[player_id] = threading.Event()
+        return cancel_event
+
+
+def finish_backfill(player_id):
+    """Retire le joueur des backfills en cours."""
+    with _lock:
+        _running.pop(player_id, None)
+
+
+def cancel_backfill(player_id):
+    """
+    Demande l'arrêt du backfill d'un joueur. La fenêtre en cours n'est pas marquée
+    comme terminée : elle sera reparcourue à la reprise.
+
+    :return: True si un backfill était en cours
+    """
+    with _lock:
+        cancel_event = _running.get(player_id)
+    if cancel_event is None:
+        return False
+    cancel_event.set()
+    return True
+
+
+def run_backfill(db, player, player_id, cancel_event, max_workers=None, on_progress=None):
+    """
+    Rattrape l'historique d'un joueur depuis BACKFILL_START_DATE, fenêtre par fenêtre.
+
+    Les IDs des fenêtres sont listés en parallèle (startTime/endTime), puis les détails
+    de chaque fenêtre passent par le pipeline commun (fetch_match_details, ingest_match,
+    GameBatchWriter). Une fenêtre entièrement ingérée est enregistrée dans BackfillCheckpoint
+    et sautée lors d'une reprise.
+
+    :param db: Objet DataBase
+    :param player: Objet Player du joueur
+    :param player_id: ID du joueur
+    :param cancel_event: threading.Event ; le backfill s'arrête dès qu'il est levé
+    :param max_workers: (Optionnel) Nombre de requêtes de détails en vol
+    :param on_progress: (Optionnel) Fonction appelée avec (fenêtres traitées, fenêtres à traiter)
+    :return: Dictionnaire avec windows, completed, failed (fenêtres à reparcourir), matches (matchs ingérés),
+             cancelled et updated_player_ids
+    """
+    now = int(time.time())
+    start_time = int(datetime.strptime(BACKFILL_START_DATE, "%Y-%m-%d").timestamp())
+    checkpoints = db.get_backfill_checkpoints(player_id)
+    windows = [window for window in backfill_windows(start_time, now) if window not in checkpoints]
+
+    result = {"windows": len(windows), "completed": 0, "failed": 0, "matches": 0, "cancelled": False, "updated_player_ids": set()}
+    champion_ids = {}
+    processed = 0
+
+    def discover(window):
+        """
+        Liste les IDs d'une fenêtre. Une fenêtre qui atteint BACKFILL_MAX_PER_WINDOW est
+        coupée en deux et chaque moitié est relistée, pour ne perdre aucun match.
+
+        :return: Tuple (IDs des matchs, liste complète) ; une liste incomplète (page en erreur,
+                 annulation) ne doit pas donner lieu à un checkpoint
+        """
+        if cancel_event.is_set():
+            return [], False
+        outcome = {}
+        match_ids = [
+            match_id
+            for page in player.iter_matchs_history(start_time=window[0], end_time=window[1], count=BACKFILL_MAX_PER_WINDOW, outcome=outcome)
+            for match_id in page
+        ]
+        if outcome["complete"]:
+            return match_ids, True
+        if len(match_ids) < BACKFILL_MAX_PER_WINDOW or window[1] - window[0] <= 1:
+            return match_ids, False
+
+        middle = (window[0] + window[1]) // 2
+        newer_ids, newer_complete = discover((middle, window[1]))
+        older_ids, older_complete = discover((window[0], middle))
+        seen = set(newer_ids)  # Un match à la limite des deux moitiés peut être listé deux fois
+        return newer_ids + [m for m in older_ids if m not in seen], newer_complete and older_complete
+
+    executor = ThreadPoolExecutor(max_workers=max(1, BACKFILL_DISCOVERY_WORKERS), thread_name_prefix="backfill-discovery")
+    try:
+        futures = {executor.submit(discover, window): window for window in windows}
+
+        for future in as_completed(futures):
+            if cancel_event.is_set():
+                break
+            window = futures[future]
+            failed = False
+
+            try:
+                match_ids, complete = future.result()
+                if not complete:
+                    ic(f"Liste des matchs incomplète pour la fenêtre {window} : elle sera reparcourue")
+                    failed = True
+            except Exception as e:
+                ic(f"Erreur lors de la découverte de la fenêtre {window}: {e}")
+                match_ids, failed = [], True
+
+            known_ids = db.get_existing_match_ids(player_id, match_ids)
+            writer = GameBatchWriter(db)
+            for match_id, match_data, error in fetch_match_details(player, [m for m in match_ids if m not in known_ids], max_workers=max_workers):
+                if cancel_event.is_set():
+                    break
+                if error is not None or match_data is None:
+                    print(f"Erreur lors du traitement du match {match_id}: {error}")
+                    failed = True
+                    continue
+                try:
+                    updated_player_ids = ingest_match(db, writer, player, match_data, champion_ids)
+                    # Seuls les matchs réellement enregistrés comptent (pas les files non suivies)
+                    if updated_player_ids:
+                        result["updated_player_ids"] |= updated_player_ids
+                        result["matches"] += 1
+                except Exception as e:
+                    print(f"Erreur lors du traitement du match {match_id}: {e}")
+                    failed = True
+
+            try:
+                writer.flush()
+            except Exception as e:
+                print(f"Erreur lors de l'écriture des matchs: {e}")
+                failed = True
+
+            if cancel_event.is_set():
+                break
+
+            # La fenêtre qui contient "maintenant" n'est jamais figée : de nouveaux matchs peuvent s'y ajouter
+            if not failed and window[1] <= now:
+                db.add_backfill_checkpoint(player_id, window[0], window[1], len(match_ids))
+                result["completed"] += 1
+            elif failed:
+                result["failed"] += 1
+
+            processed += 1
+            if on_progress is not None:
+                on_progress(processed, len(windows))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    result["cancelled"] = cancel_event.is_set()
+    return result
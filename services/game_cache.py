@@ -0,0 +1,185 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from dotenv import load_dotenv
+from icecream import ic
+
+# NumPy est requis (backend/requirements.txt). S'il manque, ou si GAME_CACHE_MAX_BYTES vaut 0,
+# le cache est désactivé et /api/filter retombe sur les agrégats SQL (get_champion_stats / get_champion_stats_from_games)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+load_dotenv()
+
+# Budget mémoire total des parties gardées en cache (en octets)
+GAME_CACHE_MAX_BYTES = int(os.getenv("GAME_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+if np is None:
+    ic("NumPy absent : cache des parties désactivé, /api/filter interroge directement la base")
+
+
+class PlayerGames:
+    """
+    Parties d'un joueur stockées en colonnes (tableaux NumPy compacts).
+    Les rôles et types de partie sont encodés par un index dans un petit vocabulaire.
+    """
+
+    def __init__(self, rows):
+        self.roles = sorted({row['role_'] or '' for row in rows})
+        self.queues = sorted({row['type_game'] or '' for row in rows})
+        role_codes = {role: code for code, role in enumerate(self.roles)}
+        queue_codes = {queue: code for code, queue in enumerate(self.queues)}
+
+        self.champion_id = np.array([row['champion_id'] for row in rows], dtype=np.int32)
+        self.role = np.array([role_codes[row['role_'] or ''] for row in rows], dtype=np.int8)
+        self.queue = np.array([queue_codes[row['type_game'] or ''] for row in rows], dtype=np.int8)
+        self.date = np.array([_to_ordinal(row['date']) for row in rows], dtype=np.int32)
+        self.kills = np.array([row['kills'] or 0 for row in rows], dtype=np.int32)
+        self.deaths = np.array([row['death'] or 0 for row in rows], dtype=np.int32)
+        self.assists = np.array([row['assists'] or 0 for row in rows], dtype=np.int32)
+        self.team_kills = np.array([row['total_team_kill'] or 0 for row in rows], dtype=np.int32)
+        self.win = np.array([bool(row['win']) for row in rows], dtype=np.bool_)
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in (
+            self.champion_id, self.role, self.queue, self.date,
+            self.kills, self.deaths, self.assists, self.team_kills, self.win
+        ))
+
+    def _codes(self, vocabulary, values):
+        return [code for code, value in enumerate(vocabulary) if value in values]
+
+    def _in_ranges(self, date_ranges):
+        in_ranges = np.zeros(len(self.date), dtype=np.bool_)
+        for start_date, end_date in date_ranges:
+            in_ranges |= (self.date >= _to_ordinal(start_date)) & (self.date <= _to_ordinal(end_date))
+        return in_ranges
+
+    def champion_stats(self, champion_names, roles=None, type_games=None, season_ranges=None, champions=None, date_range=None, date_ranges=None):
+        """
+        Statistiques par champion des parties correspondant aux filtres.
+
+        :param champion_names: Dictionnaire {champion_id: nom}
+        :param roles: (Optionnel) Liste des rôles
+        :param type_games: (Optionnel) Liste des types de partie
+        :param season_ranges: (Optionnel) Plages de dates des saisons demandées (DataBase.get_season_date_ranges), combinées par OU
+        :param champions: (Optionnel) Liste des noms de champions
+        :param date_range: (Optionnel) [date de début, date de fin] incluses
+        :param date_ranges: (Optionnel) Plages de dates acceptées (ex: splits), combinées par OU
+        :return: Liste de dictionnaires de même forme que DataBase.get_champion_stats
+        """
+        mask = np.ones(len(self.champion_id), dtype=np.bool_)
+        if roles:
+            mask &= np.isin(self.role, self._codes(self.roles, roles))
+        if type_games:
+            mask &= np.isin(self.queue, self._codes(self.queues, type_games))
+        if season_ranges is not None:
+            mask &= self._in_ranges(season_ranges)
+        if champions:
+            wanted = [champion_id for champion_id, name in champion_names.items() if name in champions]
+            mask &= np.isin(self.champion_id, wanted)
+        if date_range:
+            mask &= (self.date >= _to_ordinal(date_range[0])) & (self.date <= _to_ordinal(date_range[1]))
+        if date_ranges is not None:
+            mask &= self._in_ranges(date_ranges)
+
+        if not mask.any():
+            return []
+
+        champion_ids, groups = np.unique(self.champion_id[mask], return_inverse=True)
+        games = np.bincount(groups)
+        wins = np.bincount(groups, weights=self.win[mask])
+        kills = np.bincount(groups, weights=self.kills[mask])
+        deaths = np.bincount(groups, weights=self.deaths[mask])
+        assists = np.bincount(groups, weights=self.assists[mask])
+        team_kills = np.bincount(groups, weights=self.team_kills[mask])
+
+        return [
+            {
+                'champion_id': int(champion_id),
+                'champion_name': champion_names.get(int(champion_id)),
+                'games_played': int(games[i]),
+                'wins': int(wins[i]),
+                'losses': int(games[i] - wins[i]),
+                'total_kills': int(kills[i]),
+                'total_deaths': int(deaths[i]),
+                'total_assists': int(assists[i]),
+                'total_team_kills': int(team_kills[i]),
+            }
+            for i, champion_id in enumerate(champion_ids)
+        ]
+
+
+def _to_ordinal(value):
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if not value:
+        return 0
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+class GameCache:
+    """
+    Cache LRU des parties de joueurs récemment consultés, borné par un budget mémoire.
+    Les filtres de /api/filter sont évalués sur les colonnes en mémoire, sans requête SQL.
+    """
+
+    def __init__(self, max_bytes=GAME_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.players = OrderedDict()  # player_id -> PlayerGames
+        self.generations = {}  # player_id -> compteur incrémenté à chaque invalidation
+        self.size = 0
+
+    @property
+    def available(self):
+        return np is not None and self.max_bytes > 0
+
+    def get(self, db, player_id):
+        """
+        Parties d'un joueur, chargées depuis la base au premier accès.
+
+        :return: Objet PlayerGames
+        """
+        with self.lock:
+            player_games = self.players.get(player_id)
+            if player_games is not None:
+                self.players.move_to_end(player_id)
+                return player_games
+            generation = self.generations.get(player_id, 0)
+
+        player_games = PlayerGames(db.get_games(player_id=player_id))
+
+        with self.lock:
+            # Invalidé pendant le chargement : les parties lues sont peut-être déjà périmées,
+            # elles servent cette requête mais ne sont pas mises en cache
+            if self.generations.get(player_id, 0) != generation:
+                return player_games
+            if player_id in self.players:
+                self.size -= self.players.pop(player_id).nbytes
+            self.players[player_id] = player_games
+            self.size += player_games.nbytes
+            # Éviction des joueurs les moins récemment consultés
+            while self.size > self.max_bytes and len(self.players) > 1:
+                _, evicted = self.players.popitem(last=False)
+                self.size -= evicted.nbytes
+        ic(f"{len(player_games.champion_id)} parties du joueur {player_id} en cache ({self.size} octets au total)")
+        return player_games
+
+    def invalidate(self, player_ids):
+        """Retire du cache les joueurs dont de nouvelles parties ont été ingérées."""
+        with self.lock:
+            for player_id in player_ids:
+                self.generations[player_id] = self.generations.get(player_id, 0) + 1
+                player_games = self.players.pop(player_id, None)
+                if player_games is not None:
+                    self.size -= player_games.nbytes
+
+
+game_cache = GameCache()
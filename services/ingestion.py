@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+from objects.player import Player
+
+load_dotenv()
+
+# Nombre maximum de requêtes de détails de match en vol simultanément
+DOWNLOAD_MAX_WORKERS = int(os.getenv("DOWNLOAD_MAX_WORKERS", "8"))
+
+
+# queueId match-v5 -> type de partie stocké dans Games.type_game
+# (400 draft, 430 blind, 480 swiftplay, 490 quickplay, 700 clash)
+QUEUE_TYPES = {420: "soloq", 440: "flex", 400: "normal", 430: "normal", 480: "normal", 490: "normal", 700: "tourney"}
+# Clé de PlayerSyncState utilisée par la découverte unifiée (toutes files confondues)
+ALL_QUEUES = "all"
+
+
+def classify_match(match_data):
+    """
+    Type de partie d'un match d'après son payload (queueId, code de tournoi).
+
+    :param match_data: Payload match-v5 brut
+    :return: "soloq", "flex", "normal" ou "tourney", ou None pour une file non suivie
+    """
+    info = match_data.get("info", {})
+    if info.get("tournamentCode"):
+        return "tourney"
+    return QUEUE_TYPES.get(info.get("queueId"))
+
+
+def ingest_match(db, writer, player, match_data, champion_ids):
+    """
+    Enregistre la partie de chaque joueur suivi ayant participé à un match.
+
+    :param db: Objet DataBase (lecture des joueurs suivis et des champions)
+    :param writer: GameBatchWriter recevant les parties
+    :param player: Objet Player ayant découvert le match
+    :param match_data: Payload match-v5 brut
+    :param champion_ids: Cache {nom du champion: ID} partagé entre les appels
+    :return: Ensemble des ID des joueurs mis à jour (vide pour une file non suivie)
+    """
+    # Les files non suivies (ARAM, événements...) sont ignorées
+    match_type = classify_match(match_data)
+    if match_type is None:
+        return set()
+
+    # Un match contient 10 joueurs : on enregistre la partie de chaque joueur suivi
+    participants = Player.get_participants_stats(match_data)
+    tracked_players = db.get_players_by_puuids(list(participants.keys()))
+
+    for puuid, tracked_player_id in tracked_players.items():
+        game = participants[puuid]
+        if game["Champion"] not in champion_ids:
+            champion_ids[game["Champion"]] = db.get_champion(game["Champion"])["id"]
+        player.add_data_to_db(writer, player_id=tracked_player_id, champion_id=champion_ids[game["Champion"]], game=game, type_game=match_type)
+
+    return set(tracked_players.values())
+
+
+def fetch_match_details(player, match_ids, max_workers=None):
+    """
+    Récupère en parallèle les payloads bruts des matchs d'un joueur.
+
+    Les requêtes sont réparties sur un pool de threads borné ; chaque appel de
+    Player passe par le rate limiter global, le budget est donc partagé avec
+    les autres téléchargements en cours. match_ids peut être un générateur
+    (ex: Player.iter_matchs_history) : les IDs sont consommés au fil de l'eau, au plus
+    2 * max_workers requêtes étant en attente, et les premiers résultats arrivent
+    pendant que les pages suivantes sont encore listées.
+
+    :param player: Objet Player utilisé pour appeler l'API Riot
+    :param match_ids: Itérable des IDs de matchs
+    :param max_workers: Nombre de requêtes en vol (par défaut DOWNLOAD_MAX_WORKERS)
+    :yield: Tuple (match_id, match_data, error) dans l'ordre de complétion
+    """
+    max_workers = max(1, int(max_workers or DOWNLOAD_MAX_WORKERS))
+    match_ids = iter(match_ids)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="match-fetch")
+    try:
+        futures = {}
+        exhausted = False
+        while not exhausted or futures:
+            # Remplit la file d'attente du pool avec les prochains IDs disponibles
+            while not exhausted and len(futures) < 2 * max_workers:
+                match_id = next(match_ids, None)
+                if match_id is None:
+                    exhausted = True
+                else:
+                    futures[executor.submit(player.get_match_data, match_id)] = match_id
+            if not futures:
+                break
+
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                match_id = futures.pop(future)
+                try:
+                    yield match_id, future.result(), None
+                except Exception as e:
+                    yield match_id, None, e
+    finally:
+        # Si l'appelant s'arrête en cours de route, on annule ce qui n'a pas démarré
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,49 @@
+import os
+import time
+import threading
+from dotenv import load_dotenv
+from icecream import ic
+
+load_dotenv()
+
+# Durée (en secondes) pendant laquelle le classement est servi depuis la mémoire
+LEADERBOARD_CACHE_TTL = float(os.getenv("LEADERBOARD_CACHE_TTL", "60"))
+# Nombre maximum de joueurs renvoyés par /api/leaderboard
+LEADERBOARD_MAX_SIZE = 100
+
+_cache = {"built_at": 0.0, "leaderboard": None}
+_lock = threading.Lock()
+
+
+def get_leaderboard(db, limit=50):
+    """
+    Classement des meilleurs joueurs, servi depuis un cache mémoire à durée de vie limitée.
+
+    À l'expiration du cache, le snapshot n'est recalculé que pour les joueurs dont
+    les parties ont changé, puis le top LEADERBOARD_MAX_SIZE est relu.
+
+    :param db: Objet DataBase
+    :param limit: Nombre de joueurs à renvoyer (au plus LEADERBOARD_MAX_SIZE)
+    :return: Tuple (liste des joueurs, âge du snapshot en secondes)
+    """
+    limit = max(0, min(limit, LEADERBOARD_MAX_SIZE))
+
+    with _lock:
+        built_at, leaderboard = _cache["built_at"], _cache["leaderboard"]
+    if leaderboard is not None and time.time() - built_at < LEADERBOARD_CACHE_TTL:
+        return leaderboard[:limit], time.time() - built_at
+
+    refreshed = db.refresh_leaderboard_snapshot()
+    if refreshed:
+        ic(f"Classement recalculé pour {refreshed} joueurs")
+    leaderboard = db.get_top_players_by_score(limit=LEADERBOARD_MAX_SIZE)
+
+    with _lock:
+        _cache["built_at"], _cache["leaderboard"] = time.time(), leaderboard
+    return leaderboard[:limit], 0.0
+
+
+def invalidate_leaderboard_cache():
+    """Force le prochain appel à relire (et recalculer) le snapshot."""
+    with _lock:
+        _cache["built_at"], _cache["leaderboard"] = 0.0, None
@@ -0,0 +1,117 @@
+import os
+import copy
+import time
+import threading
+from decimal import Decimal
+from dotenv import load_dotenv
+from objects.team import Team
+
+load_dotenv()
+
+# Durée de vie maximale d'un snapshot (filet de sécurité pour les changements non signalés, ex: rangs)
+MATCHUP_CACHE_TTL = float(os.getenv("MATCHUP_CACHE_TTL", "300"))
+
+_cache = {}  # matchup_id -> (built_at, snapshot)
+_lock = threading.Lock()
+
+
+def calculate_team_stats(players):
+    """
+    Statistiques globales d'une équipe à partir de ses joueurs.
+
+    :param players: Liste des joueurs (structure de get_teams_players_with_stats)
+    :return: Dictionnaire avec total_games, winrate, ranked_solo_avg et ranked_flex_avg
+    """
+    total_games = 0
+    total_wins = 0
+
+    players_team = Team("temp", players)
+
+    for player in players:
+        if player.get('player_stats'):
+            stats = player['player_stats']
+            total_games += stats.get('total_games', 0)
+            total_wins += stats.get('total_wins', 0)
+
+    winrate = round((total_wins / total_games * 100), 2) if total_games > 0 else 0
+    ranked_solo_avg = players_team.get_average_solo_rank()
+    ranked_flex_avg = players_team.get_average_flex_rank()
+
+    return {
+        "total_games": total_games,
+        "winrate": float(winrate) if isinstance(winrate, Decimal) else winrate,
+        "ranked_solo_avg": ranked_solo_avg,
+        "ranked_flex_avg": ranked_flex_avg
+    }
+
+
+def build_matchup_snapshot(db, matchup_id):
+    """
+    Construit la vue complète d'un matchup : le matchup, ses deux équipes,
+    leurs joueurs avec statistiques et les statistiques de chaque équipe.
+
+    :param db: Objet DataBase
+    :param matchup_id: ID du matchup
+    :return: Dictionnaire du matchup avec les clés team1 et team2, ou None s'il n'existe pas
+    """
+    matchup = db.get_matchup_by_id(matchup_id)
+    if not matchup:
+        return None
+
+    teams = {}
+    # Les deux effectifs sont chargés en une seule passe
+    players_by_team = db.get_teams_players_with_stats([matchup['team1_id'], matchup['team2_id']])
+    for key in ("team1", "team2"):
+        team = db.get_team_by_id(matchup[f'{key}_id'])
+        players = players_by_team[matchup[f'{key}_id']]
+        team['stats'] = calculate_team_stats(players)
+        team['players'] = players
+        teams[key] = team
+
+    matchup['team1'] = teams["team1"]
+    matchup['team2'] = teams["team2"]
+    return matchup
+
+
+def get_matchup_snapshot(db, matchup_id):
+    """
+    Vue complète d'un matchup, servie depuis le cache si elle est encore valide.
+    Une copie est renvoyée : l'appelant peut la modifier sans altérer le cache.
+
+    :param db: Objet DataBase
+    :param matchup_id: ID du matchup
+    :return: Dictionnaire du matchup (voir build_matchup_snapshot), ou None s'il n'existe pas
+    """
+    with _lock:
+        entry = _cache.get(matchup_id)
+    if entry is not None and time.time() - entry[0] < MATCHUP_CACHE_TTL:
+        return copy.deepcopy(entry[1])
+
+    snapshot = build_matchup_snapshot(db, matchup_id)
+    if snapshot is not None:
+        with _lock:
+            _cache[matchup_id] = (time.time(), snapshot)
+    return copy.deepcopy(snapshot)
+
+
+def invalidate_matchup_cache(matchup_id=None, team_id=None, player_ids=None):
+    """
+    Retire du cache les snapshots concernés par une modification.
+
+    :param matchup_id: Matchup modifié ou supprimé
+    :param team_id: Équipe modifiée (nom, effectif) ou supprimée
+    :param player_ids: Joueurs pour lesquels de nouvelles parties ont été ingérées
+    """
+    player_ids = set(player_ids or [])
+    with _lock:
+        for cached_id, (_, snapshot) in list(_cache.items()):
+            if matchup_id is not None and cached_id == matchup_id:
+                del _cache[cached_id]
+            elif team_id is not None and team_id in (snapshot['team1_id'], snapshot['team2_id']):
+                del _cache[cached_id]
+            elif player_ids and any(
+                player['player_id'] in player_ids
+                for key in ("team1", "team2")
+                for player in snapshot[key]['players']
+            ):
+                del _cache[cached_id]
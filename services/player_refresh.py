@@ -0,0 +1,158 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+from icecream import ic
+from database.db import DataBase
+from objects.player import Player
+
+load_dotenv()
+
+# Durée (en secondes) pendant laquelle le nom/tag stocké est considéré comme à jour
+PLAYER_ACCOUNT_TTL = float(os.getenv("PLAYER_ACCOUNT_TTL", "86400"))
+# Durée (en secondes) pendant laquelle les rangs stockés sont considérés comme à jour
+PLAYER_RANK_TTL = float(os.getenv("PLAYER_RANK_TTL", "1800"))
+
+# Nombre de Riot ID résolus en parallèle par resolve_riot_ids (le rate limiter reste partagé)
+PLAYER_RESOLVE_WORKERS = int(os.getenv("PLAYER_RESOLVE_WORKERS", "5"))
+
+_refreshing = set()  # player_id dont un rafraîchissement est en cours
+_lock = threading.Lock()
+
+
+def _is_stale(refreshed_at, ttl):
+    return refreshed_at is None or (datetime.now() - refreshed_at).total_seconds() >= ttl
+
+
+def save_player(db, player, checked_at=None):
+    """
+    Insère ou met à jour un joueur résolu via l'API, avec ses rangs structurés
+    et les dates de vérification.
+
+    :param db: Objet DataBase
+    :param player: Objet Player dont le PUUID et les rangs viennent d'être lus
+    :return: ID du joueur
+    """
+    checked_at = checked_at or datetime.now()
+    player_id = db.insert_player(name=player.name, tag=player.tag, puuid=player.puuid, soloq=player.soloq, flex=player.flexq)
+    db.update_player_rank(player_id, player.soloq, player.flexq, player.ranks, refreshed_at=checked_at)
+    db.mark_player_account_checked(player_id, checked_at=checked_at)
+    return player_id
+
+
+def resolve_player(db, name, tag, api_key):
+    """
+    Trouve un joueur par son Riot ID en servant en priorité les données stockées.
+
+    Un joueur connu est renvoyé immédiatement depuis la base ; si son compte ou ses rangs
+    sont plus vieux que PLAYER_ACCOUNT_TTL / PLAYER_RANK_TTL, ils sont rafraîchis en
+    arrière-plan (stale-while-revalidate). Un joueur inconnu est résolu via l'API puis stocké.
+
+    :param db: Objet DataBase
+    :param name: Nom du joueur
+    :param tag: Tag du joueur
+    :param api_key: Clé API Riot
+    :return: Tuple (player, player_id), ou (None, None) si le joueur n'existe pas
+    """
+    try:
+        record = db.get_player(name=name, tag=tag)
+    except Exception:
+        record = None
+
+    if record:
+        player = Player.from_record(record, api_key)
+        check_account = _is_stale(record.get('last_account_check'), PLAYER_ACCOUNT_TTL)
+        refresh_rank = _is_stale(record.get('last_rank_refresh'), PLAYER_RANK_TTL)
+        if check_account or refresh_rank:
+            schedule_refresh(record['id'], api_key, check_account, refresh_rank)
+        return player, record['id']
+
+    # Joueur inconnu (ou renommé depuis) : le PUUID retrouve sa ligne existante le cas échéant
+    player = Player(name=name, tag=tag, API_KEY=api_key)
+    if not player.puuid:
+        return None, None
+    return player, save_player(db, player)
+
+
+def resolve_riot_ids(riot_ids, api_key, max_workers=None):
+    """
+    Résout plusieurs Riot ID en parallèle (PUUID et rangs), sous le rate limiter partagé.
+
+    :param riot_ids: Liste de tuples (name, tag)
+    :param api_key: Clé API Riot
+    :param max_workers: Nombre de résolutions simultanées (par défaut PLAYER_RESOLVE_WORKERS)
+    :return: Liste de tuples (player, erreur) dans l'ordre de riot_ids ;
+             player vaut None si le joueur n'existe pas ou si une erreur est survenue
+    """
+    def resolve(riot_id):
+        name, tag = riot_id
+        try:
+            player = Player(name=name, tag=tag, API_KEY=api_key)
+            if not player.puuid:
+                return None, None
+            player.ranks  # Rangs lus dans le thread de travail
+            return player, None
+        except Exception as e:
+            return None, str(e)
+
+    if not riot_ids:
+        return []
+    max_workers = max(1, min(int(max_workers or PLAYER_RESOLVE_WORKERS), len(riot_ids)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="player-resolve") as executor:
+        return list(executor.map(resolve, riot_ids))
+
+
+def schedule_refresh(player_id, api_key, check_account=True, refresh_rank=True):
+    """
+    Lance le rafraîchissement d'un joueur dans un thread, sauf s'il est déjà en cours.
+
+    :return: True si un rafraîchissement a été lancé
+    """
+    with _lock:
+        if player_id in _refreshing:
+            return False
+        _refreshing.add(player_id)
+
+    thread = threading.Thread(
+        target=refresh_player,
+        args=(player_id, api_key, check_account, refresh_rank),
+        daemon=True
+    )
+    thread.start()
+    return True
+
+
+def refresh_player(player_id, api_key, check_account=True, refresh_rank=True):
+    """
+    Vérifie le nom/tag d'un joueur (détection des changements de pseudo) et relit ses rangs.
+    Utilise sa propre connexion : peut tourner hors d'une requête HTTP.
+
+    :param player_id: ID du joueur
+    :param api_key: Clé API Riot
+    :param check_account: Vérifier le compte Riot (nom/tag)
+    :param refresh_rank: Relire les rangs classés
+    """
+    db = None
+    try:
+        db = DataBase(host="localhost")
+        player = Player.from_record(db.get_player(id=player_id), api_key)
+
+        if check_account:
+            account = player.get_account_by_puuid(player.puuid)
+            if account:
+                if account['gameName'] != player.name or account['tagLine'] != player.tag:
+                    print(f"Pseudo changé détecté: {player.name}#{player.tag} -> {account['gameName']}#{account['tagLine']}")
+                    db.update_player(player_id, name=account['gameName'], tag=account['tagLine'])
+                db.mark_player_account_checked(player_id)
+
+        if refresh_rank and player.refresh_rank() is not None:
+            db.update_player_rank(player_id, player.soloq, player.flexq, player.ranks)
+
+    except Exception as e:
+        ic(f"Erreur lors du rafraîchissement du joueur {player_id}: {e}")
+    finally:
+        if db is not None:
+            db.close()
+        with _lock:
+            _refreshing.discard(player_id)
@@ -0,0 +1,12 @@
+-- Watermarks de synchronisation par joueur et par file :
+-- dernier match ingéré (timestamp de création en secondes + ID)
+
+CREATE TABLE IF NOT EXISTS `PlayerSyncState` (
+  `player_id` int(11) NOT NULL,
+  `queue_type` varchar(20) NOT NULL,
+  `last_match_time` bigint(20) NOT NULL,
+  `last_match_id` varchar(50) NOT NULL,
+  `updated_at` timestamp NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`player_id`,`queue_type`),
+  CONSTRAINT `fk_syncstate_player` FOREIGN KEY (`player_id`) REFERENCES `Player` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,14 @@
+-- Une partie n'est stockée qu'une fois par joueur : clé unique (player_id, id_match)
+-- utilisée par les écritures groupées (INSERT IGNORE).
+
+-- Suppression des doublons existants (on garde la ligne la plus ancienne)
+DELETE g1 FROM `Games` g1
+JOIN `Games` g2
+  ON g1.player_id = g2.player_id
+ AND g1.id_match = g2.id_match
+ AND g1.id > g2.id;
+
+-- L'index unique commence par player_id : il remplace l'ancien index de la clé étrangère
+ALTER TABLE `Games`
+  ADD UNIQUE KEY `unique_player_match` (`player_id`,`id_match`),
+  DROP KEY `player_id`;
@@ -0,0 +1,30 @@
+-- Agrégats par joueur, champion, rôle, type de partie et saison (saison = année - 2010).
+-- Maintenus par DataBase.insert_games dans la transaction d'écriture des matchs.
+
+CREATE TABLE IF NOT EXISTS `PlayerChampionStats` (
+  `player_id` int(11) NOT NULL,
+  `champion_id` int(11) NOT NULL,
+  `role_` varchar(100) NOT NULL DEFAULT '',
+  `type_game` varchar(100) NOT NULL DEFAULT '',
+  `season` smallint(6) NOT NULL,
+  `games` int(11) NOT NULL DEFAULT 0,
+  `wins` int(11) NOT NULL DEFAULT 0,
+  `losses` int(11) NOT NULL DEFAULT 0,
+  `kills` int(11) NOT NULL DEFAULT 0,
+  `deaths` int(11) NOT NULL DEFAULT 0,
+  `assists` int(11) NOT NULL DEFAULT 0,
+  `team_kills` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`player_id`,`champion_id`,`role_`,`type_game`,`season`),
+  KEY `idx_pcs_champion` (`champion_id`),
+  CONSTRAINT `fk_pcs_player` FOREIGN KEY (`player_id`) REFERENCES `Player` (`id`) ON DELETE CASCADE,
+  CONSTRAINT `fk_pcs_champion` FOREIGN KEY (`champion_id`) REFERENCES `Champion` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Rollup initial des matchs déjà stockés
+REPLACE INTO `PlayerChampionStats`
+  (`player_id`, `champion_id`, `role_`, `type_game`, `season`, `games`, `wins`, `losses`, `kills`, `deaths`, `assists`, `team_kills`)
+SELECT `player_id`, `champion_id`, COALESCE(`role_`, ''), COALESCE(`type_game`, ''), COALESCE(YEAR(`date`) - 2010, 0),
+       COUNT(*), SUM(`win` = 1), SUM(`win` = 0), SUM(`kills`), SUM(`death`), SUM(`assists`), SUM(`total_team_kill`)
+FROM `Games`
+WHERE `player_id` IS NOT NULL AND `champion_id` IS NOT NULL
+GROUP BY `player_id`, `champion_id`, COALESCE(`role_`, ''), COALESCE(`type_game`, ''), COALESCE(YEAR(`date`) - 2010, 0);
@@ -0,0 +1,30 @@
+-- Classement précalculé (LeaderboardSnapshot) et joueurs à recalculer (LeaderboardDirty).
+-- DataBase.insert_games marque les joueurs modifiés ; refresh_leaderboard_snapshot ne recalcule qu'eux.
+
+CREATE TABLE IF NOT EXISTS `LeaderboardSnapshot` (
+  `player_id` int(11) NOT NULL,
+  `total_champions` int(11) NOT NULL,
+  `total_games` int(11) NOT NULL,
+  `total_wins` int(11) NOT NULL,
+  `total_losses` int(11) NOT NULL,
+  `overall_winrate` decimal(6,2) NOT NULL,
+  `overall_kda` decimal(8,2) NOT NULL,
+  `overall_kp` decimal(6,2) NOT NULL,
+  `average_score` decimal(8,2) NOT NULL,
+  `eligible` tinyint(1) NOT NULL DEFAULT 0,
+  `computed_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`player_id`),
+  KEY `idx_leaderboard_score` (`eligible`,`average_score`),
+  CONSTRAINT `fk_leaderboard_player` FOREIGN KEY (`player_id`) REFERENCES `Player` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `LeaderboardDirty` (
+  `player_id` int(11) NOT NULL,
+  `marked_at` datetime(6) NOT NULL DEFAULT current_timestamp(6),
+  PRIMARY KEY (`player_id`),
+  CONSTRAINT `fk_leaderboard_dirty_player` FOREIGN KEY (`player_id`) REFERENCES `Player` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Premier calcul : tous les joueurs ayant des parties
+INSERT IGNORE INTO `LeaderboardDirty` (`player_id`)
+SELECT DISTINCT `player_id` FROM `Games` WHERE `player_id` IS NOT NULL;
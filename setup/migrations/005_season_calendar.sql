@@ -0,0 +1,30 @@
+-- Calendrier des saisons (saison = année - 2010) et de leurs splits.
+-- Les filtres de saison/split sur Games sont traduits en plages de dates (voir DataBase._build_games_filters).
+-- Par défaut chaque saison a un seul split couvrant l'année civile ; pour découper une saison,
+-- remplacer sa ligne par plusieurs splits sans sortir de l'année (le rollup PlayerChampionStats
+-- reste indexé par année).
+
+CREATE TABLE IF NOT EXISTS `SeasonCalendar` (
+  `season` smallint(6) NOT NULL,
+  `split` tinyint(4) NOT NULL,
+  `start_date` date NOT NULL,
+  `end_date` date NOT NULL,
+  PRIMARY KEY (`season`,`split`),
+  KEY `idx_calendar_dates` (`start_date`,`end_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO `SeasonCalendar` (`season`, `split`, `start_date`, `end_date`) VALUES
+  (10,1,'2020-01-01','2020-12-31'),
+  (11,1,'2021-01-01','2021-12-31'),
+  (12,1,'2022-01-01','2022-12-31'),
+  (13,1,'2023-01-01','2023-12-31'),
+  (14,1,'2024-01-01','2024-12-31'),
+  (15,1,'2025-01-01','2025-12-31'),
+  (16,1,'2026-01-01','2026-12-31'),
+  (17,1,'2027-01-01','2027-12-31'),
+  (18,1,'2028-01-01','2028-12-31'),
+  (19,1,'2029-01-01','2029-12-31'),
+  (20,1,'2030-01-01','2030-12-31');
+
+-- Filtres par joueur et par date servis par un parcours d'intervalle
+ALTER TABLE `Games` ADD KEY IF NOT EXISTS `idx_games_player_date` (`player_id`, `date`);
@@ -0,0 +1,19 @@
+-- Rangs structurés et dates de fraîcheur des joueurs.
+-- Une recherche sert le joueur depuis la base et ne rappelle l'API Riot qu'au-delà de
+-- PLAYER_ACCOUNT_TTL (nom/tag) ou PLAYER_RANK_TTL (rangs), en arrière-plan.
+-- Les joueurs existants ont des dates NULL : ils seront rafraîchis à leur prochaine recherche.
+
+ALTER TABLE `Player`
+  ADD COLUMN IF NOT EXISTS `soloq_tier` varchar(20) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `soloq_rank` varchar(5) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `soloq_lp` int(11) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `soloq_wins` int(11) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `soloq_losses` int(11) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `flex_tier` varchar(20) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `flex_rank` varchar(5) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `flex_lp` int(11) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `flex_wins` int(11) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `flex_losses` int(11) DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `last_rank_refresh` datetime DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `last_account_check` datetime DEFAULT NULL,
+  ADD KEY IF NOT EXISTS `idx_player_name_tag` (`name`, `tag`);
@@ -0,0 +1,12 @@
+-- Fenêtres de backfill terminées, par joueur (timestamps en secondes).
+-- Un backfill interrompu (crash, annulation) reprend en sautant les fenêtres enregistrées ici.
+
+CREATE TABLE IF NOT EXISTS `BackfillCheckpoint` (
+  `player_id` int(11) NOT NULL,
+  `window_start` bigint(20) NOT NULL,
+  `window_end` bigint(20) NOT NULL,
+  `match_count` int(11) NOT NULL DEFAULT 0,
+  `completed_at` timestamp NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`player_id`,`window_start`),
+  CONSTRAINT `fk_backfill_player` FOREIGN KEY (`player_id`) REFERENCES `Player` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,152 @@
+import os
+import json
+import mmap
+import zlib
+import threading
+from dotenv import load_dotenv
+from icecream import ic
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+load_dotenv()
+
+DEFAULT_MATCH_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "matches")
+MATCH_STORE_DIR = os.getenv("MATCH_STORE_DIR") or DEFAULT_MATCH_STORE_DIR
+MATCH_STORE_MMAP = os.getenv("MATCH_STORE_MMAP", "false").lower() in ("1", "true", "yes")
+
+
+class MatchStore:
+    """
+    Stockage local append-only des payloads match-v5 bruts.
+
+    - matches.dat : enregistrements JSON compressés (zlib) mis bout à bout
+    - matches.idx : une ligne "match_id offset longueur" par enregistrement
+
+    L'index est chargé en mémoire (dictionnaire) pour une recherche en O(1).
+    Un match est immuable une fois terminé : aucune invalidation n'est nécessaire.
+    """
+
+    def __init__(self, directory=MATCH_STORE_DIR, use_mmap=MATCH_STORE_MMAP):
+        self.directory = directory
+        self.data_path = os.path.join(directory, "matches.dat")
+        self.index_path = os.path.join(directory, "matches.idx")
+        self.use_mmap = use_mmap
+        self.lock = threading.Lock()
+        self.index = {}
+        self.index_offset = 0  # Position déjà lue dans le fichier d'index
+        self.mmap = None
+        self.mmap_size = 0
+        self.available = True
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Crée les fichiers s'ils n'existent pas encore
+            open(self.data_path, "ab").close()
+            open(self.index_path, "ab").close()
+            self._load_index()
+        except OSError as e:
+            ic(f"Stockage des matchs indisponible ({directory}): {e}")
+            self.available = False
+
+    def _load_index(self):
+        """Lit les nouvelles lignes de l'index (écrites par ce processus ou un autre). Doit être appelé sous le lock."""
+        with open(self.index_path, "rb") as f:
+            f.seek(self.index_offset)
+            for line in f:
+                # Une ligne incomplète (écriture en cours) sera relue au prochain passage
+                if not line.endswith(b"\n"):
+                    break
+                self.index_offset += len(line)
+                parts = line.decode("utf-8").split()
+                if len(parts) == 3:
+                    self.index[parts[0]] = (int(parts[1]), int(parts[2]))
+
+    def __contains__(self, match_id):
+        return self._lookup(match_id) is not None
+
+    def _lookup(self, match_id):
+        with self.lock:
+            if not self.available:
+                return None
+            entry = self.index.get(match_id)
+            if entry is None:
+                # Un autre processus a peut-être ajouté ce match entre-temps
+                self._load_index()
+                entry = self.index.get(match_id)
+            return entry
+
+    def _read(self, offset, length):
+        """Lit un enregistrement, via mmap si activé."""
+        if self.use_mmap:
+            with self.lock:
+                if self.mmap is None or offset + length > self.mmap_size:
+                    if self.mmap is not None:
+                        self.mmap.close()
+                    with open(self.data_path, "rb") as f:
+                        self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.mmap_size = len(self.mmap)
+                return self.mmap[offset:offset + length]
+
+        with open(self.data_path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def get(self, match_id):
+        """
+        Récupère le payload brut d'un match.
+
+        :param match_id: ID du match (ex: EUW1_7325519309)
+        :return: Dictionnaire match-v5, ou None si le match n'est pas stocké
+        """
+        entry = self._lookup(match_id)
+        if entry is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(self._read(*entry)))
+        except (OSError, ValueError, zlib.error) as e:
+            ic(f"Enregistrement illisible pour le match {match_id}: {e}")
+            return None
+
+    def put(self, match_id, match_data):
+        """
+        Ajoute le payload brut d'un match s'il n'est pas déjà stocké.
+
+        :param match_id: ID du match
+        :param match_data: Dictionnaire match-v5 tel que renvoyé par l'API
+        """
+        if match_id in self:
+            return
+        record = zlib.compress(json.dumps(match_data, separators=(",", ":")).encode("utf-8"))
+
+        with self.lock:
+            if not self.available:
+                return
+            try:
+                with open(self.data_path, "ab") as data_file, open(self.index_path, "ab") as index_file:
+                    # Verrou exclusif : plusieurs workers peuvent écrire dans le même store
+                    if fcntl is not None:
+                        fcntl.flock(index_file.fileno(), fcntl.LOCK_EX)
+                    try:
+                        self._load_index()
+                        if match_id in self.index:
+                            return
+                        data_file.seek(0, os.SEEK_END)
+                        offset = data_file.tell()
+                        data_file.write(record)
+                        data_file.flush()
+                        # L'index n'est écrit qu'une fois les données en place
+                        line = f"{match_id} {offset} {len(record)}\n".encode("utf-8")
+                        index_file.write(line)
+                        index_file.flush()
+                        self.index_offset += len(line)
+                        self.index[match_id] = (offset, len(record))
+                    finally:
+                        if fcntl is not None:
+                            fcntl.flock(index_file.fileno(), fcntl.LOCK_UN)
+            except OSError as e:
+                ic(f"Impossible de stocker le match {match_id}: {e}")
+
+match_store = MatchStore()
@@ -1,64 +1,151 @@
+import os
+import re
 import time
 import threading
+from urllib.parse import urlparse
 import requests
 from icecream import ic
+from utils.ratelimit_store import create_rate_limit_store
+
+# Limites applicatives utilisées tant que l'API ne nous a pas renvoyé les siennes
+# Format identique au header X-App-Rate-Limit : "limite:secondes,limite:secondes"
+DEFAULT_APP_RATE_LIMIT = os.getenv("RIOT_APP_RATE_LIMIT", "20:1,100:120")
+
+# Endpoints Riot : chaque méthode a ses propres limites (X-Method-Rate-Limit)
+METHOD_PATTERNS = [
+    ("account-v1.by-riot-id", re.compile(r"^/riot/account/v1/accounts/by-riot-id/")),
+    ("account-v1.by-puuid", re.compile(r"^/riot/account/v1/accounts/by-puuid/")),
+    ("league-v4.entries-by-puuid", re.compile(r"^/lol/league/v4/entries/by-puuid/")),
+    ("summoner-v4.by-puuid", re.compile(r"^/lol/summoner/v4/summoners/by-puuid/")),
+    ("match-v5.ids-by-puuid", re.compile(r"^/lol/match/v5/matches/by-puuid/[^/]+/ids$")),
+    ("match-v5.by-id", re.compile(r"^/lol/match/v5/matches/[^/]+$")),
+]
+
+
+def parse_rate_limit_header(value):
+    """
+    Parse un header de rate limit Riot.
+
+    Exemple: "20:1,100:120" -> [(20, 1), (100, 120)]
+    Pour les headers *-Count, le premier nombre est le nombre de requêtes déjà consommées.
+    """
+    limits = []
+    if not value:
+        return limits
+    for part in value.split(","):
+        try:
+            count, seconds = part.strip().split(":")
+            limits.append((int(count), int(seconds)))
+        except ValueError:
+            continue
+    return limits
+
+
+def get_rate_limit_keys(url):
+    """
+    Détermine les buckets consommés par une requête.
+
+    Les limites applicatives sont propres à chaque région de routage (europe, euw1, ...)
+    et les limites de méthode à chaque endpoint de cette région.
+
+    :return: Tuple (clé applicative, clé de méthode ou None)
+    """
+    if not url:
+        return ("app", None), None
+    parsed = urlparse(url)
+    host = parsed.hostname
+    for method, pattern in METHOD_PATTERNS:
+        if pattern.match(parsed.path):
+            return ("app", host), ("method", host, method)
+    return ("app", host), ("method", host, parsed.path)
+
 
 class RateLimiter:
-    def __init__(self, max_per_second=20, max_per_2_minutes=100):
-        self.max_per_second = max_per_second
-        self.max_per_2_minutes = max_per_2_minutes
+    def __init__(self, default_app_limits=DEFAULT_APP_RATE_LIMIT, store=None):
+        self.default_app_limits = parse_rate_limit_header(default_app_limits)
+        # L'état des fenêtres vit dans le store (mémoire, fichier ou Redis) pour
+        # pouvoir être partagé entre processus ; les limites apprises restent locales
+        self.store = store if store is not None else create_rate_limit_store()
         self.lock = threading.Lock()
+        self.limits = {}
 
-        self.requests_per_second = []
-        self.requests_per_2_minutes = []
+    @staticmethod
+    def _store_key(key):
+        return "|".join(str(part) for part in key)
 
-    def wait_for_slot(self):
-        """Attend un slot disponible selon les limites de rate"""
+    def _get_limits(self, key):
+        """Limites connues pour une clé (les méthodes n'en ont pas tant que l'API ne les a pas communiquées)."""
         with self.lock:
-            current_time = time.time()
-
-            # Nettoyage des requêtes obsolètes
-            self.requests_per_second = [t for t in self.requests_per_second if t > current_time - 1]
-            self.requests_per_2_minutes = [t for t in self.requests_per_2_minutes if t > current_time - 120]
-
-            # Vérification du quota par seconde
-            if len(self.requests_per_second) >= self.max_per_second:
-                sleep_time = 1 - (current_time - self.requests_per_second[0])
-                if sleep_time > 0:
-                    ic(f"Rate limit per second: waiting {sleep_time:.2f}s")
-                    time.sleep(sleep_time)
-
-            # Vérification du quota par 2 minutes
-            if len(self.requests_per_2_minutes) >= self.max_per_2_minutes:
-                sleep_time = 120 - (current_time - self.requests_per_2_minutes[0])
-                if sleep_time > 0:
-                    ic(f"Rate limit per 2 minutes: waiting {sleep_time:.2f}s")
-                    time.sleep(sleep_time)
-
-            # Enregistrement de la requête
-            self.requests_per_second.append(time.time())
-            self.requests_per_2_minutes.append(time.time())
-
-    def handle_rate_limit_error(self, response, max_retries=10):
+            if key not in self.limits:
+                self.limits[key] = list(self.default_app_limits) if key[0] == "app" else []
+            return self.limits[key]
+
+    def reserve(self, url=None):
+        """
+        Réserve un slot dans tous les buckets consommés par la requête.
+
+        Le slot est enregistré immédiatement, puis le lock est relâché : plusieurs
+        threads (ou processus, selon le store) peuvent ainsi réserver des slots
+        successifs sans s'attendre.
+
+        :return: Timestamp auquel la requête pourra partir
+        """
+        app_key, method_key = get_rate_limit_keys(url)
+        entries = [(self._store_key(app_key), self._get_limits(app_key))]
+        if method_key is not None:
+            entries.append((self._store_key(method_key), self._get_limits(method_key)))
+        return self.store.reserve(entries, time.time())
+
+    def wait_for_slot(self, url=None):
+        """Attend un slot disponible dans tous les buckets consommés par la requête"""
+        sleep_time = self.reserve(url) - time.time()
+        if sleep_time > 0:
+            ic(f"Rate limit: waiting {sleep_time:.2f}s")
+            time.sleep(sleep_time)
+
+    def update_from_response(self, url, response):
+        """
+        Configure les buckets à partir des headers renvoyés par l'API Riot
+        (X-App-Rate-Limit, X-Method-Rate-Limit et leurs compteurs *-Count).
+        """
+        if response is None:
+            return
+        app_key, method_key = get_rate_limit_keys(url)
+        headers = response.headers
+        current_time = time.time()
+
+        for key, prefix in ((app_key, "X-App-Rate-Limit"), (method_key, "X-Method-Rate-Limit")):
+            if key is None:
+                continue
+            limits = parse_rate_limit_header(headers.get(prefix))
+            if limits and sorted(limits) != sorted(self._get_limits(key)):
+                ic(f"Nouvelles limites pour {key}: {limits}")
+                with self.lock:
+                    self.limits[key] = limits
+            counts = parse_rate_limit_header(headers.get(f"{prefix}-Count"))
+            if counts:
+                self.store.sync_counts(self._store_key(key), self._get_limits(key), counts, current_time)
+
+    def handle_rate_limit_error(self, response, url=None, max_retries=10):
         """
         Gère les erreurs de rate limit de l'API Riot
         Retourne le temps d'attente recommandé
         """
         if response.status_code != 429:
             return 0
-        
+
         # Récupération des headers de rate limit
         retry_after = response.headers.get('Retry-After')
         x_rate_limit_type = response.headers.get('X-Rate-Limit-Type', '')
         x_rate_limit_limit = response.headers.get('X-Rate-Limit-Limit', '')
         x_rate_limit_count = response.headers.get('X-Rate-Limit-Count', '')
-        
+
         ic(f"Rate limit détecté: {x_rate_limit_type}")
         ic(f"Headers: Limit={x_rate_limit_limit}, Count={x_rate_limit_count}")
-        
+
         # Calcul du temps d'attente
         wait_time = 0
-        
+
         if retry_after:
             # Si l'API nous dit combien attendre
             wait_time = int(retry_after)
@@ -74,12 +161,18 @@ class RateLimiter:
             else:
                 # Rate limit par seconde (court)
                 wait_time = 2   # 2 secondes
-        
-        # Attendre le temps calculé
-        if wait_time > 0:
+
+        # Bloquer le bucket concerné : le retry et tous les autres appels
+        # qui le consomment attendront dans wait_for_slot, hors du lock
+        app_key, method_key = get_rate_limit_keys(url)
+        blocked_key = app_key if 'application' in x_rate_limit_type.lower() else method_key
+        if blocked_key is not None:
+            self.store.block(self._store_key(blocked_key), time.time() + wait_time)
+            ic(f"Bucket {blocked_key} bloqué {wait_time}s avant retry...")
+        elif wait_time > 0:
             ic(f"Attente de {wait_time}s avant retry...")
             time.sleep(wait_time)
-        
+
         return wait_time
 
     def make_request_with_retry(self, request_func, *args, **kwargs):
@@ -89,30 +182,32 @@ class RateLimiter:
         """
         max_retries = 20  # Maximum de retries
         retry_count = 0
-        
+        url = args[0] if args else kwargs.get('url')
+
         while retry_count < max_retries:
             try:
                 # Attendre un slot avant la requête
-                self.wait_for_slot()
-                
+                self.wait_for_slot(url)
+
                 # Faire la requête
                 response = request_func(*args, **kwargs)
-                
+                self.update_from_response(url, response)
+
                 # Si succès, retourner la réponse
                 if response.status_code == 200:
                     return response
-                
+
                 # Si rate limit, gérer l'attente
                 if response.status_code == 429:
-                    wait_time = self.handle_rate_limit_error(response)
+                    wait_time = self.handle_rate_limit_error(response, url)
                     retry_count += 1
                     ic(f"Retry {retry_count}/{max_retries} après rate limit")
                     continue
-                
+
                 # Autres erreurs (404, 500, etc.)
                 ic(f"Erreur {response.status_code}: {response.text}")
                 return response
-                
+
             except requests.exceptions.RequestException as e:
                 ic(f"Erreur de requête: {e}")
                 retry_count += 1
@@ -122,8 +217,10 @@ class RateLimiter:
                     time.sleep(wait_time)
                 else:
                     raise e
-        
+
         # Si on arrive ici, on a épuisé les retries
         raise Exception(f"Trop de tentatives ({max_retries}) pour cette requête")
 
+# Rate limiter unique du processus : tous les appels à l'API Riot doivent passer par lui.
+# Avec RATE_LIMIT_BACKEND=file ou redis, tous les workers partagent le même budget.
 rate_limiter = RateLimiter()
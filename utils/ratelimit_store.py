@@ -0,0 +1,339 @@
+import os
+import json
+import time
+import uuid
+import bisect
+import tempfile
+import threading
+from collections import deque
+from icecream import ic
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class RateBucket:
+    """Ensemble de fenêtres glissantes (limite, durée) pour une clé applicative ou de méthode."""
+
+    def __init__(self, limits=None):
+        self.windows = {}  # secondes -> (limite, deque des timestamps)
+        self.blocked_until = 0
+        if limits:
+            self.set_limits(limits)
+
+    def set_limits(self, limits):
+        """Met à jour les limites en conservant l'historique des fenêtres existantes."""
+        windows = {}
+        for limit, seconds in limits:
+            timestamps = self.windows[seconds][1] if seconds in self.windows else deque()
+            windows[seconds] = (limit, timestamps)
+        self.windows = windows
+
+    def limits(self):
+        return sorted((limit, seconds) for seconds, (limit, _) in self.windows.items())
+
+    def purge(self, now):
+        """Retire les requêtes sorties de leur fenêtre."""
+        for seconds, (_, timestamps) in self.windows.items():
+            while timestamps and timestamps[0] <= now - seconds:
+                timestamps.popleft()
+
+    def next_slot(self, now):
+        """
+        Premier instant où une requête peut passer dans toutes les fenêtres.
+
+        Les fenêtres contiennent aussi les réservations futures : une requête est
+        acceptée à l'instant t si moins de `limite` requêtes sont postérieures à
+        t - durée, ce qui reste vrai quel que soit l'ordre d'arrivée des réservations.
+        """
+        self.purge(now)
+        slot = max(now, self.blocked_until)
+        for seconds, (limit, timestamps) in self.windows.items():
+            if len(timestamps) >= limit:
+                slot = max(slot, timestamps[len(timestamps) - limit] + seconds)
+        return slot
+
+    def record(self, timestamp):
+        """Enregistre une requête (ou une réservation) en gardant les fenêtres triées."""
+        for _, timestamps in self.windows.values():
+            if not timestamps or timestamps[-1] <= timestamp:
+                timestamps.append(timestamp)
+            else:
+                bisect.insort(timestamps, timestamp)
+
+    def sync_counts(self, counts, now):
+        """
+        Recale les fenêtres sur les compteurs renvoyés par l'API.
+
+        Si Riot a compté plus de requêtes que nous (redémarrage, autre processus...),
+        on ajoute des requêtes fictives pour ne pas dépasser le budget réel.
+        """
+        self.purge(now)
+        for count, seconds in counts:
+            if seconds not in self.windows:
+                continue
+            _, timestamps = self.windows[seconds]
+            # Seules les requêtes déjà parties sont connues de Riot
+            sent = bisect.bisect_right(timestamps, now)
+            for _ in range(count - sent):
+                bisect.insort(timestamps, now)
+
+    def to_dict(self):
+        return {
+            "blocked_until": self.blocked_until,
+            "windows": {str(seconds): [limit, list(timestamps)] for seconds, (limit, timestamps) in self.windows.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        bucket = cls()
+        bucket.blocked_until = data.get("blocked_until", 0)
+        for seconds, (limit, timestamps) in data.get("windows", {}).items():
+            bucket.windows[int(seconds)] = (limit, deque(timestamps))
+        return bucket
+
+
+# ==================== STORES ====================
+
+class MemoryRateLimitStore:
+    """État du rate limiter en mémoire : suffisant pour un seul processus."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def _get_bucket(self, key, limits):
+        """Récupère (ou crée) le bucket d'une clé en alignant ses limites. Doit être appelé sous le lock."""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = RateBucket()
+            self.buckets[key] = bucket
+        if limits is not None and sorted(limits) != bucket.limits():
+            bucket.set_limits(limits)
+        return bucket
+
+    def reserve(self, entries, now):
+        """
+        Réserve atomiquement un slot dans plusieurs buckets.
+
+        :param entries: Liste de tuples (clé, limites)
+        :param now: Timestamp courant
+        :return: Timestamp du slot réservé
+        """
+        with self.lock:
+            buckets = [self._get_bucket(key, limits) for key, limits in entries]
+            slot = max(bucket.next_slot(now) for bucket in buckets)
+            for bucket in buckets:
+                bucket.record(slot)
+        return slot
+
+    def sync_counts(self, key, limits, counts, now):
+        with self.lock:
+            self._get_bucket(key, limits).sync_counts(counts, now)
+
+    def block(self, key, until):
+        with self.lock:
+            bucket = self._get_bucket(key, None)
+            bucket.blocked_until = max(bucket.blocked_until, until)
+
+
+class FileRateLimitStore(MemoryRateLimitStore):
+    """
+    État partagé entre les processus d'une même machine.
+
+    Les buckets sont sérialisés dans un fichier JSON ; chaque opération relit
+    l'état, le modifie et le réécrit sous un verrou exclusif sur le fichier.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def _locked(self, operation):
+        # Le lock de thread évite que deux threads du même processus se marchent dessus
+        with self.lock:
+            with open(self.path, "a+") as f:
+                self._lock_file(f)
+                try:
+                    f.seek(0)
+                    content = f.read()
+                    state = json.loads(content) if content else {}
+                    self.buckets = {key: RateBucket.from_dict(data) for key, data in state.items()}
+
+                    result = operation()
+
+                    f.seek(0)
+                    f.truncate()
+                    json.dump({key: bucket.to_dict() for key, bucket in self.buckets.items()}, f)
+                    f.flush()
+                    return result
+                finally:
+                    self._unlock_file(f)
+
+    @staticmethod
+    def _lock_file(f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    @staticmethod
+    def _unlock_file(f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def reserve(self, entries, now):
+        def operation():
+            buckets = [self._get_bucket(key, limits) for key, limits in entries]
+            slot = max(bucket.next_slot(now) for bucket in buckets)
+            for bucket in buckets:
+                bucket.record(slot)
+            return slot
+        return self._locked(operation)
+
+    def sync_counts(self, key, limits, counts, now):
+        self._locked(lambda: self._get_bucket(key, limits).sync_counts(counts, now))
+
+    def block(self, key, until):
+        def operation():
+            bucket = self._get_bucket(key, None)
+            bucket.blocked_until = max(bucket.blocked_until, until)
+        self._locked(operation)
+
+
+class RedisRateLimitStore:
+    """
+    État partagé entre plusieurs machines via un serveur compatible Redis.
+
+    Chaque fenêtre est un sorted set (score = timestamp de la requête) ; la
+    réservation est faite par un script Lua pour rester atomique.
+    """
+
+    RESERVE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local member = ARGV[2]
+    local nblocked = tonumber(ARGV[3])
+    local slot = now
+    for i = 1, nblocked do
+        local blocked = tonumber(redis.call('GET', KEYS[i]) or '0')
+        if blocked > slot then slot = blocked end
+    end
+    local nwindows = #KEYS - nblocked
+    for i = 1, nwindows do
+        local key = KEYS[nblocked + i]
+        local limit = tonumber(ARGV[2 + 2 * i])
+        local seconds = tonumber(ARGV[3 + 2 * i])
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now - seconds)
+        local count = redis.call('ZCARD', key)
+        if count >= limit then
+            local entry = redis.call('ZRANGE', key, count - limit, count - limit, 'WITHSCORES')
+            local candidate = tonumber(entry[2]) + seconds
+            if candidate > slot then slot = candidate end
+        end
+    end
+    for i = 1, nwindows do
+        local key = KEYS[nblocked + i]
+        local seconds = tonumber(ARGV[3 + 2 * i])
+        redis.call('ZADD', key, slot, member)
+        redis.call('EXPIRE', key, math.ceil(slot - now + seconds) + 1)
+    end
+    return tostring(slot)
+    """
+
+    SYNC_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local member = ARGV[2]
+    for i = 1, #KEYS do
+        local count = tonumber(ARGV[1 + 2 * i])
+        local seconds = tonumber(ARGV[2 + 2 * i])
+        redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - seconds)
+        local sent = redis.call('ZCOUNT', KEYS[i], '-inf', now)
+        for j = 1, count - sent do
+            redis.call('ZADD', KEYS[i], now, member .. ':' .. j)
+        end
+        redis.call('EXPIRE', KEYS[i], math.ceil(seconds) + 1)
+    end
+    return 0
+    """
+
+    BLOCK_SCRIPT = """
+    local blocked_until = tonumber(ARGV[1])
+    local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+    if blocked_until > current then
+        redis.call('SET', KEYS[1], ARGV[1], 'EX', math.ceil(blocked_until - tonumber(ARGV[2])) + 1)
+    end
+    return 0
+    """
+
+    def __init__(self, url, prefix="zhonyas:ratelimit"):
+        if redis is None:
+            raise Exception("Le backend Redis du rate limiter nécessite le package 'redis' (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.reserve_script = self.client.register_script(self.RESERVE_SCRIPT)
+        self.sync_script = self.client.register_script(self.SYNC_SCRIPT)
+        self.block_script = self.client.register_script(self.BLOCK_SCRIPT)
+
+    def _window_key(self, key, seconds):
+        return f"{self.prefix}:{key}:{seconds}"
+
+    def _blocked_key(self, key):
+        return f"{self.prefix}:{key}:blocked"
+
+    def reserve(self, entries, now):
+        blocked_keys = [self._blocked_key(key) for key, _ in entries]
+        window_keys = []
+        args = [now, uuid.uuid4().hex, len(blocked_keys)]
+        for key, limits in entries:
+            for limit, seconds in limits or []:
+                window_keys.append(self._window_key(key, seconds))
+                args.extend([limit, seconds])
+        return float(self.reserve_script(keys=blocked_keys + window_keys, args=args))
+
+    def sync_counts(self, key, limits, counts, now):
+        known_windows = {seconds for _, seconds in limits or []}
+        keys = []
+        args = [now, uuid.uuid4().hex]
+        for count, seconds in counts:
+            if seconds in known_windows:
+                keys.append(self._window_key(key, seconds))
+                args.extend([count, seconds])
+        if keys:
+            self.sync_script(keys=keys, args=args)
+
+    def block(self, key, until):
+        self.block_script(keys=[self._blocked_key(key)], args=[until, time.time()])
+
+
+def create_rate_limit_store(backend=None):
+    """
+    Crée le store du rate limiter selon RATE_LIMIT_BACKEND :
+    - memory : état local au processus (par défaut)
+    - file   : fichier verrouillé, partagé par les workers d'une même machine
+    - redis  : serveur compatible Redis (RATE_LIMIT_REDIS_URL), partagé entre machines
+    """
+    backend = (backend or os.getenv("RATE_LIMIT_BACKEND", "memory")).lower()
+
+    if backend == "file":
+        path = os.getenv("RATE_LIMIT_FILE") or os.path.join(tempfile.gettempdir(), "zhonyas_ratelimit.json")
+        ic(f"Rate limiter partagé via le fichier {path}")
+        return FileRateLimitStore(path)
+
+    if backend == "redis":
+        url = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+        ic(f"Rate limiter partagé via Redis ({url})")
+        return RedisRateLimitStore(url)
+
+    return MemoryRateLimitStore()
@@ -0,0 +1,69 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Timeouts (en secondes) pour la connexion et la lecture des réponses Riot
+RIOT_CONNECT_TIMEOUT = float(os.getenv("RIOT_CONNECT_TIMEOUT", "3.05"))
+RIOT_READ_TIMEOUT = float(os.getenv("RIOT_READ_TIMEOUT", "10"))
+# Nombre de connexions keep-alive conservées par hôte (europe, euw1, ...)
+RIOT_POOL_SIZE = int(os.getenv("RIOT_POOL_SIZE", "16"))
+
+
+class RiotClient:
+    """
+    Client HTTP partagé pour tous les appels à l'API Riot.
+
+    Une seule session requests est utilisée par processus : les connexions
+    TCP/TLS vers chaque hôte sont conservées et réutilisées entre les appels,
+    les instances de Player et les threads de téléchargement.
+    """
+
+    def __init__(self, pool_size=RIOT_POOL_SIZE, connect_timeout=RIOT_CONNECT_TIMEOUT, read_timeout=RIOT_READ_TIMEOUT):
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.lock = threading.Lock()
+        self.session = None
+
+    def _get_session(self):
+        """Crée la session à la première utilisation."""
+        if self.session is None:
+            with self.lock:
+                if self.session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.headers.update({
+                        "Accept": "application/json",
+                        "Accept-Encoding": "gzip, deflate",
+                        "Connection": "keep-alive",
+                    })
+                    self.session = session
+        return self.session
+
+    def get(self, url, api_key=None, headers=None, **kwargs):
+        """
+        Effectue un GET sur l'API Riot en réutilisant les connexions du pool.
+
+        :param url: URL complète de l'endpoint
+        :param api_key: Clé API Riot (ajoutée dans le header X-Riot-Token)
+        :param headers: Headers supplémentaires
+        :return: Objet requests.Response
+        """
+        request_headers = dict(headers or {})
+        if api_key:
+            request_headers["X-Riot-Token"] = api_key
+        kwargs.setdefault("timeout", self.timeout)
+        return self._get_session().get(url, headers=request_headers, **kwargs)
+
+    def close(self):
+        """Ferme toutes les connexions du pool."""
+        with self.lock:
+            if self.session is not None:
+                self.session.close()
+                self.session = None
+
+riot_client = RiotClient()
@@ -0,0 +1,98 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # Le calcul scalaire prend le relais
+    np = None
+
+# Bonus d'expérience : +10 points par palier de 25 parties, limité à 100
+TIER_SIZE = 25
+TIER_BONUS = 10
+TIER_BONUS_MAX = 100
+
+
+def round_score(value):
+    """
+    Arrondi à 2 décimales (demi vers le haut), identique à l'arrondi vectoriel de
+    score_champions : les deux chemins donnent exactement les mêmes valeurs.
+    """
+    return math.floor(value * 100 + 0.5) / 100
+
+
+def score_champion(games, wins, kills, deaths, assists, team_kills):
+    """
+    Calcule les statistiques et le score de dangerosité d'un champion (version scalaire).
+
+    Formule :
+    1. Performance micro : 0.6 * min(kda / 10, 1) + 0.4 * kp / 100 (sur 100)
+    2. Efficacité : sigmoïde du winrate centrée sur 50% (sur 100)
+    3. Fiabilité : 0.3 + 0.7 * sigmoïde du nombre de parties centrée sur 10
+    4. Bonus par paliers de 25 parties (+10 par palier, limité à 100)
+    score = (0.65 * efficacité + 0.25 * micro + bonus) * fiabilité
+
+    :param games: Nombre de parties
+    :param wins: Nombre de victoires
+    :param kills: Total des kills
+    :param deaths: Total des morts
+    :param assists: Total des assistances
+    :param team_kills: Total des kills de l'équipe
+    :return: Tuple (winrate, kda, kill_participation, dangerousness)
+    """
+    games = int(games or 0)
+    kills = float(kills or 0)
+    assists = float(assists or 0)
+
+    winrate = round_score(100 * int(wins or 0) / games) if games > 0 else 0.0
+    kda = round_score((kills + assists) / max(1.0, float(deaths or 0)))
+    kill_participation = round_score((kills + assists) / max(1.0, float(team_kills or 0)) * 100)
+
+    if games == 0:
+        return winrate, kda, kill_participation, 0.0
+
+    micro_performance = (0.6 * min(kda / 10, 1) + 0.4 * kill_participation / 100) * 100
+    efficiency = 100 / (1 + math.exp(-(winrate - 50) / 5))
+    confidence = 0.3 + 0.7 / (1 + math.exp(-(games - 10) / 2))
+    palier_bonus = min((games // TIER_SIZE) * TIER_BONUS, TIER_BONUS_MAX)
+
+    score = (0.65 * efficiency + 0.25 * micro_performance + palier_bonus) * confidence
+    return winrate, kda, kill_participation, round_score(score)
+
+
+def score_champions(games, wins, kills, deaths, assists, team_kills):
+    """
+    Calcule les scores de dangerosité de nombreux groupes (joueur, champion) en une passe.
+    Les paramètres sont des séquences de même longueur ; NumPy est utilisé s'il est
+    installé, sinon chaque groupe passe par score_champion.
+
+    :return: Tuple de listes (winrates, kdas, kill_participations, dangerousness)
+    """
+    if np is None:
+        results = [score_champion(*row) for row in zip(games, wins, kills, deaths, assists, team_kills)]
+        return tuple(list(column) for column in zip(*results)) if results else ([], [], [], [])
+
+    games = np.asarray(games, dtype=np.float64)
+    wins = np.asarray(wins, dtype=np.float64)
+    kills = np.asarray(kills, dtype=np.float64)
+    deaths = np.asarray(deaths, dtype=np.float64)
+    assists = np.asarray(assists, dtype=np.float64)
+    team_kills = np.asarray(team_kills, dtype=np.float64)
+
+    played = games > 0
+    winrate = _round_scores(np.divide(100 * wins, games, out=np.zeros_like(games), where=played))
+    kda = _round_scores((kills + assists) / np.maximum(1.0, deaths))
+    kill_participation = _round_scores((kills + assists) / np.maximum(1.0, team_kills) * 100)
+
+    micro_performance = (0.6 * np.minimum(kda / 10, 1) + 0.4 * kill_participation / 100) * 100
+    efficiency = 100 / (1 + np.exp(-(winrate - 50) / 5))
+    confidence = 0.3 + 0.7 / (1 + np.exp(-(games - 10) / 2))
+    palier_bonus = np.minimum((games // TIER_SIZE) * TIER_BONUS, TIER_BONUS_MAX)
+
+    score = (0.65 * efficiency + 0.25 * micro_performance + palier_bonus) * confidence
+    dangerousness = np.where(played, _round_scores(score), 0.0)
+
+    return winrate.tolist(), kda.tolist(), kill_participation.tolist(), dangerousness.tolist()
+
+
+def _round_scores(values):
+    # Version vectorielle de round_score
+    return np.floor(values * 100 + 0.5) / 100